@@ -1,13 +1,20 @@
 ```python
 from flask import Flask, render_template, jsonify, request, g
-from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
+import socketio
+import uvicorn
+from a2wsgi import WSGIMiddleware
 import datetime
+import asyncio
+import hashlib
+import inspect
 import sqlite3
+import threading
+import time
 import os
 import logging
 from functools import wraps
@@ -22,6 +29,7 @@ from api.middleware import (
 )
 import json
 import random
+import orjson
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,12 +48,52 @@ app.config['DATABASE'] = os.environ.get('DATABASE', 'quantum_nexus.db')
 
 # Initialize extensions
 CORS(app, resources={r"/api/*": {"origins": "*"}})
-socketio = SocketIO(app, cors_allowed_origins="*", logger=True, engineio_logger=True)
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins="*", logger=True, engineio_logger=True)
 limiter = Limiter(app=app, key_func=get_remote_address, default_limits=["200 per minute"])
 
 # Initialize components
 auth_manager = AuthManager(app.config['JWT_SECRET_KEY'])
-websocket_server = WebSocketServer(socketio)
+websocket_server = WebSocketServer(sio)
+
+# Threads running Flask views for the ASGI server
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS', 32))
+
+# Callables run in order at ASGI startup, once the event loop is running
+_startup_hooks = [websocket_server.start]
+
+def on_startup(func):
+    """Register a function or coroutine function to run at ASGI startup"""
+    _startup_hooks.append(func)
+    return func
+
+# Callables run in order at ASGI shutdown, before the event loop closes
+_shutdown_hooks = []
+
+def on_shutdown(func):
+    """Register a function or coroutine function to run at ASGI shutdown"""
+    _shutdown_hooks.append(func)
+    return func
+
+async def _run_hooks(hooks):
+    for hook in hooks:
+        result = hook()
+        if inspect.isawaitable(result):
+            await result
+
+async def _run_startup_hooks():
+    await _run_hooks(_startup_hooks)
+
+async def _run_shutdown_hooks():
+    await _run_hooks(_shutdown_hooks)
+
+# ASGI entry point: Socket.IO traffic is handled on the event loop, every
+# other path is passed to Flask on a pool of WSGI_THREADS threads
+asgi_app = socketio.ASGIApp(
+    sio,
+    WSGIMiddleware(app, workers=WSGI_THREADS),
+    on_startup=_run_startup_hooks,
+    on_shutdown=_run_shutdown_hooks,
+)
 
 # Database connection
 def get_db():
@@ -147,6 +195,39 @@ def init_db():
         
         # Ensure honeypot integration schema is available
         honeypot_integrator.ensure_schema()
+
+# Set once init_db() has succeeded; until then /readyz reports 503
+_db_ready = False
+_db_lock = threading.Lock()
+
+def ensure_db():
+    """Run init_db() once; concurrent callers wait for the first to finish"""
+    global _db_ready
+    if _db_ready:
+        return
+    with _db_lock:
+        if not _db_ready:
+            init_db()
+            _db_ready = True
+
+@on_startup
+def _warm_db():
+    """Initialize the database off the event loop so the port binds first"""
+    def warm():
+        try:
+            ensure_db()
+        except Exception as e:
+            # Retried by the first request that needs the database
+            logger.error(f"Database initialization failed: {e}")
+    asyncio.get_running_loop().run_in_executor(None, warm)
+
+# Endpoints served without waiting for the database
+_NO_DB_ENDPOINTS = frozenset({'static', 'health_check', 'liveness_check', 'health_detail', 'readiness_check'})
+
+@app.before_request
+def _require_db():
+    if not _db_ready and request.endpoint not in _NO_DB_ENDPOINTS:
+        ensure_db()
 # Routes
 @app.route('/')
 @limiter.exempt
@@ -182,6 +263,64 @@ def settings_page():
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'timestamp': datetime.datetime.utcnow().isoformat()}), 200
+
+# System health_check(fast=...) callable, installed by the process entry point
+_health_probe = None
+# Seconds a health snapshot is served for, used for Cache-Control
+_health_max_age = 0
+# (snapshot timestamp, JSON body, ETag) for the last snapshot served
+_health_body = (None, None, None)
+
+def set_health_probe(probe, max_age=0):
+    """Install the callable backing /healthz and /health/detail
+    
+    ``max_age`` is how long the probe serves a snapshot before refreshing it.
+    """
+    global _health_probe, _health_max_age
+    _health_probe = probe
+    _health_max_age = max_age
+
+def _health_response(fast):
+    global _health_body
+    if _health_probe is None:
+        return health_check()
+    health_status = _health_probe(fast=fast)
+    # Snapshots are identified by their probe timestamp, so a snapshot is
+    # serialized and hashed once however often it is served
+    timestamp, body, etag = _health_body
+    if timestamp != health_status['timestamp']:
+        timestamp = health_status['timestamp']
+        body = orjson.dumps(health_status)
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        _health_body = (timestamp, body, etag)
+    
+    if health_status['status'] != 'healthy':
+        return body, 503, {'Content-Type': 'application/json', 'Cache-Control': 'no-store'}
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': f'max-age={max(0, int(_health_max_age - (time.time() - timestamp)))}'
+    }
+    if request.if_none_match.contains(etag):
+        return '', 304, headers
+    headers['Content-Type'] = 'application/json'
+    return body, 200, headers
+
+@app.route('/healthz')
+def liveness_check():
+    """Liveness probe; stops at the first failing component"""
+    return _health_response(fast=True)
+
+@app.route('/health/detail')
+def health_detail():
+    """Full component health report"""
+    return _health_response(fast=False)
+
+@app.route('/readyz')
+def readiness_check():
+    """Readiness probe; 503 until the database has been initialized"""
+    if _db_ready:
+        return jsonify({'status': 'ready'}), 200
+    return jsonify({'status': 'starting'}), 503
 # API Routes
 @app.route('/api/register', methods=['POST'])
 @limiter.limit("5 per hour")
@@ -582,15 +721,13 @@ def after_request(response):
     return add_security_headers(response)
 
 if __name__ == '__main__':
-    # Initialize database
-    init_db()
-    
-    # Run the application
-    socketio.run(app, 
-                 host='0.0.0.0', 
-                 port=int(os.environ.get('PORT', 5000)), 
-                 debug=os.environ.get('DEBUG', 'False').lower() == 'true',
-                 allow_unsafe_werkzeug=True)
+    # Run the application; the database is initialized once it is listening
+    uvicorn.run(asgi_app,
+                host='0.0.0.0',
+                port=int(os.environ.get('PORT', 5000)),
+                loop='auto',
+                http='httptools',
+                log_level='debug' if os.environ.get('DEBUG', 'False').lower() == 'true' else 'info')
 ```
 
 ```python
\ No newline at end of file
@@ -5,17 +5,21 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
+import os
+import queue
 import sqlite3
+import threading
 import time
 from contextlib import contextmanager
 from functools import wraps
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from honeypot.challenge.challenge_api import ChallengeAPI
 from honeypot.fingerprinting.fingerprint_api import FingerprintAPI
 from honeypot.sandbox.sandbox_core import SandboxCore
 from honeypot.verification.verification_api import VerificationAPI
+from honeypot.write_buffer import DURABILITY_MODES, SQLITE_PRAGMAS, WriteBuffer, open_event_connection
 
 logger = logging.getLogger(__name__)
 
@@ -23,42 +27,67 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 # Database helpers
 # ---------------------------------------------------------------------------
+_INSERT_LOG = "INSERT INTO system_logs (level, component, message, metadata) VALUES (?, ?, ?, ?)"
+
+
 class DatabaseConnectionPool:
-    """Very small SQLite connection pool used by the integration layer."""
+    """Very small SQLite connection pool used by the integration layer.
+
+    Connections are opened lazily up to ``pool_size``; once all are in use,
+    ``get_connection`` blocks until one is returned or ``timeout`` expires.
+    """
 
-    def __init__(self, db_path: Path | str, pool_size: int = 5) -> None:
+    def __init__(
+        self,
+        db_path: Path | str,
+        pool_size: int = 5,
+        pragmas: Iterable[str] = SQLITE_PRAGMAS,
+        timeout: Optional[float] = 30.0,
+    ) -> None:
         self.db_path = str(db_path)
         self.pool_size = pool_size
+        self.pragmas = tuple(pragmas)
+        self.timeout = timeout
         self.connections: List[sqlite3.Connection] = []
-        self.in_use: set[sqlite3.Connection] = set()
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
 
     def get_connection(self) -> sqlite3.Connection:
-        for conn in self.connections:
-            if conn not in self.in_use:
-                self.in_use.add(conn)
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self.connections) < self.pool_size:
+                conn = self._open()
+                self.connections.append(conn)
                 return conn
 
-        if len(self.connections) < self.pool_size:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            self.connections.append(conn)
-            self.in_use.add(conn)
-            return conn
-
-        raise RuntimeError("Database connection pool exhausted")
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError("Database connection pool exhausted") from None
 
     def return_connection(self, conn: sqlite3.Connection) -> None:
-        if conn in self.in_use:
-            self.in_use.remove(conn)
+        self._idle.put(conn)
 
     def close_all(self) -> None:
-        for conn in self.connections:
-            try:
-                conn.close()
-            except sqlite3.Error:  # pragma: no cover - defensive
-                pass
-        self.connections.clear()
-        self.in_use.clear()
+        with self._lock:
+            for conn in self.connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:  # pragma: no cover - defensive
+                    pass
+            self.connections.clear()
+            self._idle = queue.LifoQueue()
 
 
 class DataCache:
@@ -97,18 +126,34 @@ class DataCache:
 class HoneypotIntegrator:
     """Main integration class that orchestrates individual honeypot modules."""
 
-    def __init__(self, db_path: Path | str = "quantum_nexus.db") -> None:
+    def __init__(
+        self,
+        db_path: Path | str = "quantum_nexus.db",
+        read_pool_size: Optional[int] = None,
+        write_pool_size: int = 1,
+        durability: str = "normal",
+    ) -> None:
         self.db_path = Path(db_path)
-        self.db_pool = DatabaseConnectionPool(self.db_path)
+        # Readers get a pool sized to the machine; writes go through their own
+        # (by default single-connection) pool so they never contend for the lock
+        self.read_pool = DatabaseConnectionPool(self.db_path, read_pool_size or os.cpu_count() or 4)
+        self.write_pool = DatabaseConnectionPool(self.db_path, write_pool_size)
         self.cache = DataCache()
 
         self._run_migrations()
 
-        # Initialise subsystem APIs with a shared database path
-        self.fingerprint_api = FingerprintAPI(self.db_path)
+        # system_logs is append-only, so events are queued and written in
+        # batches on a connection of their own instead of on the request path
+        self._log_conn, relaxed = open_event_connection(self.db_path, durability)
+        self._logs = WriteBuffer(self._log_conn, threading.Lock(), _INSERT_LOG, "system_logs", checkpoint=relaxed)
+
+        # Initialise subsystem APIs with a shared database path. Durability
+        # only applies to their append-only event tables; bot_tracking and
+        # challenges keep the pool's synchronous=NORMAL.
+        self.fingerprint_api = FingerprintAPI(self.db_path, durability=durability)
         self.challenge_api = ChallengeAPI(self.db_path)
-        self.verification_api = VerificationAPI(self.db_path)
-        self.sandbox_core = SandboxCore(self.db_path)
+        self.verification_api = VerificationAPI(self.db_path, durability=durability)
+        self.sandbox_core = SandboxCore(self.db_path, durability=durability)
 
     # ------------------------------------------------------------------
     def _run_migrations(self) -> None:
@@ -171,10 +216,20 @@ class HoneypotIntegrator:
                 if {"bot_visits", "bot_work"} - tables:
                     return
 
+                # Visit timestamps are epoch seconds, or local-time strings in
+                # rows written before that change; both become UTC datetimes
+                # to match bot_tracking's CURRENT_TIMESTAMP values
                 legacy_cursor.execute(
                     """
-                    SELECT ip, MIN(timestamp), MAX(timestamp), MAX(user_agent)
-                    FROM bot_visits
+                    SELECT ip, MIN(seen), MAX(seen), MAX(user_agent)
+                    FROM (
+                        SELECT ip, user_agent,
+                            CASE typeof(timestamp)
+                                WHEN 'text' THEN datetime(timestamp, 'utc')
+                                ELSE datetime(timestamp, 'unixepoch')
+                            END AS seen
+                        FROM bot_visits
+                    )
                     GROUP BY ip
                     """
                 )
@@ -223,9 +278,13 @@ class HoneypotIntegrator:
 
     # ------------------------------------------------------------------
     @contextmanager
-    def get_db_connection(self) -> sqlite3.Connection:
-        conn = self.db_pool.get_connection()
+    def get_db_connection(self, write: bool = False) -> sqlite3.Connection:
+        pool = self.write_pool if write else self.read_pool
+        conn = pool.get_connection()
         try:
+            if write:
+                # Take the write lock up front rather than upgrading mid-transaction
+                conn.execute("BEGIN IMMEDIATE")
             yield conn
             conn.commit()
         except Exception as exc:
@@ -233,21 +292,24 @@ class HoneypotIntegrator:
             logger.error("Database transaction failed: %s", exc)
             raise
         finally:
-            self.db_pool.return_connection(conn)
+            pool.return_connection(conn)
 
     @staticmethod
     def transaction(func):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            with self.get_db_connection() as conn:
+            with self.get_db_connection(write=True) as conn:
                 return func(self, conn, *args, **kwargs)
 
         return wrapper
 
     # ------------------------------------------------------------------
-    def process_fingerprint(self, fingerprint_data: Dict[str, Any]) -> Dict[str, Any]:
-        analysis = self.fingerprint_api.analyze_fingerprint(fingerprint_data)
+    def process_fingerprint(
+        self, fingerprint_data: Dict[str, Any], raw_payload: bytes | str | None = None
+    ) -> Dict[str, Any]:
+        analysis = self.fingerprint_api.analyze_fingerprint(fingerprint_data, raw_payload)
         self._store_fingerprint_result(analysis)
+        self.challenge_api.invalidate_difficulty(analysis["fingerprint_hash"])
         self.log_event(
             "INFO",
             "fingerprinting",
@@ -293,6 +355,8 @@ class HoneypotIntegrator:
 
     def verify_challenge_response(self, challenge_id: str, response: Any) -> Dict[str, Any]:
         result = self.challenge_api.verify_response(challenge_id, response)
+        # The challenge row may still be queued in ChallengeAPI's write-behind buffer
+        self.challenge_api.flush()
         self._update_challenge_history(challenge_id, result)
         status = "Success" if result.get("success") else "Failed"
         self.log_event(
@@ -341,6 +405,9 @@ class HoneypotIntegrator:
 
     # ------------------------------------------------------------------
     def verify_bot(self, fingerprint_hash: str, evidence: Dict[str, Any]) -> Dict[str, Any]:
+        # Verification reads the latest challenge response and sandbox run
+        self.challenge_api.flush()
+        self.sandbox_core.flush()
         result = self.verification_api.verify_bot(fingerprint_hash, evidence)
         self._store_verification_result(fingerprint_hash, result)
         self.log_event(
@@ -457,6 +524,7 @@ class HoneypotIntegrator:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
+        self._logs.flush()
         with self.get_db_connection() as conn:
             cursor = conn.cursor()
             query = "SELECT * FROM system_logs WHERE 1=1"
@@ -482,15 +550,7 @@ class HoneypotIntegrator:
             return [dict(row) for row in cursor.fetchall()]
 
     def log_event(self, level: str, component: str, message: str, metadata: Optional[Dict[str, Any]] = None) -> None:
-        with self.get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO system_logs (level, component, message, metadata)
-                VALUES (?, ?, ?, ?)
-                """,
-                (level, component, message, json.dumps(metadata) if metadata else None),
-            )
+        self._logs.put((level, component, message, json.dumps(metadata) if metadata else None))
 
     def get_system_stats(self) -> Dict[str, Any]:
         with self.get_db_connection() as conn:
@@ -523,10 +583,27 @@ class HoneypotIntegrator:
         }
 
     def close(self) -> None:
-        self.db_pool.close_all()
+        self._logs.close()
+        self._log_conn.close()
+        self.read_pool.close_all()
+        self.write_pool.close_all()
         self.cache.clear()
 
 
-honeypot_integrator = HoneypotIntegrator()
+# Same settings as ProductionConfig, read directly because
+# config/production.py is not importable from here
+_durability = os.environ.get("DATABASE_DURABILITY", "normal")
+if _durability not in DURABILITY_MODES:
+    raise ValueError(f"DATABASE_DURABILITY must be one of {DURABILITY_MODES}, got {_durability!r}")
+_read_pool_size = int(os.environ.get("DATABASE_READ_POOL_SIZE", os.cpu_count() or 4))
+_write_pool_size = int(os.environ.get("DATABASE_WRITE_POOL_SIZE", 1))
+if _read_pool_size < 1 or _write_pool_size < 1:
+    raise ValueError("DATABASE_READ_POOL_SIZE and DATABASE_WRITE_POOL_SIZE must be at least 1")
+
+honeypot_integrator = HoneypotIntegrator(
+    read_pool_size=_read_pool_size,
+    write_pool_size=_write_pool_size,
+    durability=_durability,
+)
 
 __all__ = ["HoneypotIntegrator", "honeypot_integrator", "DatabaseConnectionPool", "DataCache"]
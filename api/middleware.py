@@ -181,6 +181,9 @@ class APIKeyMiddleware:
     def __init__(self, app=None):
         self.app = app
         self.api_keys = {}  # In production, store in secure database
+        # Lengths of the registered keys, checked before the dict lookup so
+        # unknown (and oversized) keys are rejected without hashing them
+        self._key_lengths = set()
         if app:
             self.init_app(app)
             
@@ -189,6 +192,11 @@ class APIKeyMiddleware:
         # Load API keys from configuration
         api_keys_config = app.config.get('API_KEYS', {})
         self.api_keys.update(api_keys_config)
+        self._refresh_key_lengths()
+        
+    def _refresh_key_lengths(self):
+        """Recompute the set of registered key lengths."""
+        self._key_lengths = {len(key) for key in self.api_keys}
         
     def authenticate_api_key(self, f):
         """API key authentication decorator."""
@@ -204,7 +212,7 @@ class APIKeyMiddleware:
                 return jsonify({'error': 'API key required'}), 401
                 
             if not self._validate_api_key(api_key):
-                logger.warning(f"Invalid API key used: {api_key[:8]}...")
+                logger.warning("Invalid API key used: %s...", api_key[:8])
                 return jsonify({'error': 'Invalid API key'}), 401
                 
             # Store API key info in g
@@ -216,7 +224,7 @@ class APIKeyMiddleware:
         
     def _validate_api_key(self, api_key: str) -> bool:
         """Validate API key."""
-        return api_key in self.api_keys
+        return len(api_key) in self._key_lengths and api_key in self.api_keys
         
     def generate_api_key(self, name: str, permissions: list = None) -> str:
         """Generate a new API key."""
@@ -227,12 +235,14 @@ class APIKeyMiddleware:
             'created_at': time.time(),
             'last_used': None
         }
+        self._key_lengths.add(len(key))
         return key
         
     def revoke_api_key(self, api_key: str) -> bool:
         """Revoke an API key."""
         if api_key in self.api_keys:
             del self.api_keys[api_key]
+            self._refresh_key_lengths()
             return True
         return False
 
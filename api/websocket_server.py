@@ -1,147 +1,295 @@
 ```python
-from flask_socketio import SocketIO, emit, join_room, leave_room
+import asyncio
 import json
 import datetime
 import logging
+import sys
+import time
+from collections import deque
+
+from socketio import packet
+
+# Maximum number of broadcasts waiting for the emitter task; when full the
+# oldest pending events are dropped rather than blocking socket handlers
+EMIT_QUEUE_SIZE = 8192
+
+# Interned room names so room-table lookups hit the identity fast path
+ROOM_DASHBOARD = sys.intern('dashboard')
+ROOM_LOGS = sys.intern('logs')
+
+# Minimum interval between dashboard frame rebuilds, in seconds
+SNAPSHOT_INTERVAL = 0.1
+
+# Namespace the dashboard frame is encoded for and sent on
+NAMESPACE = '/'
+
+# Seconds between refreshes of the cached log level flags
+LOG_LEVEL_REFRESH_INTERVAL = 5
+
+# Seconds between connection count broadcasts to dashboard clients
+CONNECTION_COUNT_INTERVAL = 1
 
 class WebSocketServer:
-    """WebSocket server for real-time updates"""
+    """WebSocket server for real-time updates
+    
+    Runs on a python-socketio ``AsyncServer``; handlers and background tasks
+    are coroutines on the ASGI event loop, while the ``emit_*`` methods stay
+    synchronous so Flask views running on worker threads can call them.
+    """
     
     def __init__(self, socketio):
         self.socketio = socketio
         self.connected_clients = set()
+        # Kept alongside connected_clients so broadcasts never need len()
+        self._client_count = 0
         self.logger = logging.getLogger(__name__)
+        # Bound logger methods and cached level flags for the hot paths; the
+        # flags are refreshed periodically by _run_log_level_refresher()
+        self._info = self.logger.info
+        self._dbg = self.logger.debug
+        self._err = self.logger.error
+        self._refresh_log_levels()
+        # Reusable event envelopes, see _event_template(); only the emitter
+        # task touches them
+        self._templates = {}
+        # Broadcasts are queued here and sent by a single emitter task so that
+        # handlers never pay the fan-out cost themselves
+        self._emit_ring = deque(maxlen=EMIT_QUEUE_SIZE)
+        self._emit_ready = self.socketio.eio.create_event()
+        # Event loop running the server, set by start()
+        self._loop = None
+        # Latest encoded dashboard_update packet and the monotonic time it
+        # was built at, see _dashboard_frame()
+        self._frame = None
+        self._frame_built = 0.0
         self.setup_handlers()
     
+    async def start(self):
+        """Start the background tasks once the event loop is running"""
+        self._loop = asyncio.get_running_loop()
+        self.socketio.start_background_task(self._run_emitter)
+        self.socketio.start_background_task(self._run_log_level_refresher)
+        self.socketio.start_background_task(self._run_connection_count_broadcaster)
+        # Events queued before startup are sent straight away
+        if self._emit_ring:
+            self._emit_ready.set()
+    
+    def _refresh_log_levels(self):
+        """Cache which log levels are currently enabled"""
+        self._info_on = self.logger.isEnabledFor(logging.INFO)
+        self._dbg_on = self.logger.isEnabledFor(logging.DEBUG)
+    
+    async def _run_log_level_refresher(self):
+        """Background task that picks up logging configuration changes"""
+        while True:
+            await self.socketio.sleep(LOG_LEVEL_REFRESH_INTERVAL)
+            self._refresh_log_levels()
+    
+    async def _run_connection_count_broadcaster(self):
+        """Background task that pushes the live connection gauge"""
+        while True:
+            await self.socketio.sleep(CONNECTION_COUNT_INTERVAL)
+            await self.broadcast_connection_count()
+    
+    def _event_template(self, event_type):
+        """Return the reusable envelope dict for an event type"""
+        template = self._templates.get(event_type)
+        if template is None:
+            template = self._templates[event_type] = {'type': event_type, 'data': None, 'timestamp': None}
+        return template
+    
+    def _emit_event(self, event_type, data, room):
+        """Queue an event for broadcast by the emitter task"""
+        self._emit_ring.append((event_type, data, datetime.datetime.utcnow().isoformat(), room))
+        # Callers may be Flask views on WSGI worker threads, so the emitter is
+        # woken through the loop; if it is already set, the pending drain
+        # will pick this event up
+        loop = self._loop
+        if loop is not None and not self._emit_ready.is_set():
+            loop.call_soon_threadsafe(self._emit_ready.set)
+    
+    async def _send_event(self, event_type, data, timestamp, room):
+        """Emit data wrapped in the reusable envelope for its event type"""
+        # emit() serializes the payload before returning, so the envelope can
+        # be cleared and reused instead of allocating a new dict per event
+        event_data = self._event_template(event_type)
+        event_data['data'] = data
+        event_data['timestamp'] = timestamp
+        try:
+            await self.socketio.emit(event_type, event_data, room=room)
+        finally:
+            event_data['data'] = None
+            event_data['timestamp'] = None
+    
+    def _dashboard_frame(self):
+        """Return the encoded dashboard_update packet, rebuilt at most once per interval"""
+        now = time.monotonic()
+        if self._frame is None or now - self._frame_built >= SNAPSHOT_INTERVAL:
+            snapshot = {
+                'type': 'dashboard_update',
+                'data': {
+                    'timestamp': datetime.datetime.utcnow().isoformat()
+                }
+            }
+            self._frame = self.socketio.packet_class(
+                packet.EVENT, namespace=NAMESPACE, data=['dashboard_update', snapshot]
+            ).encode()
+            self._frame_built = now
+        return self._frame
+    
+    async def _send_dashboard_frame(self, room):
+        """Send the cached dashboard frame to every client in a room"""
+        # emit() would encode the payload again on every call; the frame is
+        # handed to Engine.IO as-is instead. Recipients are collected first
+        # because the room table can change while the sends are awaited.
+        frame = self._dashboard_frame()
+        eio_sids = [eio_sid for _, eio_sid in self.socketio.manager.get_participants(NAMESPACE, room)]
+        if eio_sids:
+            await asyncio.gather(*(self.socketio.eio.send(eio_sid, frame) for eio_sid in eio_sids))
+    
+    async def _run_emitter(self):
+        """Background task that drains the emit queue"""
+        ring = self._emit_ring
+        while True:
+            await self._emit_ready.wait()
+            self._emit_ready.clear()
+            # Dashboard updates requested within the same drain are coalesced
+            # into a single broadcast per room
+            updated_rooms = set()
+            while ring:
+                event_type, data, timestamp, room = ring.popleft()
+                try:
+                    if event_type == 'dashboard_update':
+                        if room in updated_rooms:
+                            continue
+                        updated_rooms.add(room)
+                        await self._send_dashboard_frame(room)
+                    else:
+                        await self._send_event(event_type, data, timestamp, room)
+                except Exception as e:
+                    self._err("Emitter error for %s: %s", event_type, e)
+    
     def setup_handlers(self):
         """Set up Socket.IO event handlers"""
         
         @self.socketio.on('connect')
-        def handle_connect():
+        async def handle_connect(sid, environ, auth=None):
             """Handle client connection"""
             try:
                 # Client authentication would go here
-                self.connected_clients.add(request.sid)
-                self.logger.info(f"Client connected: {request.sid}")
-                emit('connected', {'status': 'connected', 'client_id': request.sid})
+                if sid not in self.connected_clients:
+                    self.connected_clients.add(sid)
+                    self._client_count += 1
+                if self._info_on:
+                    self._info("Client connected: %s", sid)
+                await self.socketio.emit('connected', {'status': 'connected', 'client_id': sid}, to=sid)
             except Exception as e:
-                self.logger.error(f"Connection error: {str(e)}")
+                self._err("Connection error: %s", e)
         
         @self.socketio.on('disconnect')
-        def handle_disconnect():
+        async def handle_disconnect(sid, reason=None):
             """Handle client disconnection"""
             try:
-                self.connected_clients.discard(request.sid)
-                self.logger.info(f"Client disconnected: {request.sid}")
+                if sid in self.connected_clients:
+                    self.connected_clients.discard(sid)
+                    self._client_count -= 1
+                if self._info_on:
+                    self._info("Client disconnected: %s", sid)
             except Exception as e:
-                self.logger.error(f"Disconnection error: {str(e)}")
+                self._err("Disconnection error: %s", e)
         
         @self.socketio.on('subscribe')
-        def handle_subscribe(data):
+        async def handle_subscribe(sid, data):
             """Handle subscription to events"""
             try:
-                room = data.get('room', 'dashboard')
-                join_room(room)
-                self.logger.info(f"Client {request.sid} joined room: {room}")
-                emit('subscribed', {'room': room}, room=request.sid)
+                room = sys.intern(data.get('room', ROOM_DASHBOARD))
+                await self.socketio.enter_room(sid, room)
+                if self._info_on:
+                    self._info("Client %s joined room: %s", sid, room)
+                await self.socketio.emit('subscribed', {'room': room}, to=sid)
             except Exception as e:
-                self.logger.error(f"Subscription error: {str(e)}")
+                self._err("Subscription error: %s", e)
         
         @self.socketio.on('unsubscribe')
-        def handle_unsubscribe(data):
+        async def handle_unsubscribe(sid, data):
             """Handle unsubscription from events"""
             try:
-                room = data.get('room', 'dashboard')
-                leave_room(room)
-                self.logger.info(f"Client {request.sid} left room: {room}")
-                emit('unsubscribed', {'room': room}, room=request.sid)
+                room = sys.intern(data.get('room', ROOM_DASHBOARD))
+                await self.socketio.leave_room(sid, room)
+                if self._info_on:
+                    self._info("Client %s left room: %s", sid, room)
+                await self.socketio.emit('unsubscribed', {'room': room}, to=sid)
             except Exception as e:
-                self.logger.error(f"Unsubscription error: {str(e)}")
+                self._err("Unsubscription error: %s", e)
         
         @self.socketio.on('heartbeat')
-        def handle_heartbeat(data):
+        async def handle_heartbeat(sid, data):
             """Handle client heartbeat"""
             try:
-                emit('heartbeat_ack', {'timestamp': datetime.datetime.utcnow().isoformat()})
+                await self.socketio.emit('heartbeat_ack', {'timestamp': datetime.datetime.utcnow().isoformat()}, to=sid)
             except Exception as e:
-                self.logger.error(f"Heartbeat error: {str(e)}")
+                self._err("Heartbeat error: %s", e)
         
         @self.socketio.on('request_update')
-        def handle_request_update(data):
+        async def handle_request_update(sid, data):
             """Handle manual update requests"""
             try:
                 update_type = data.get('type', 'all')
-                room = data.get('room', 'dashboard')
+                room = sys.intern(data.get('room', ROOM_DASHBOARD))
                 
                 # Broadcast update to all clients in the room
                 self.emit_dashboard_update(room=room)
-                self.logger.info(f"Update requested by {request.sid} for room: {room}")
+                if self._info_on:
+                    self._info("Update requested by %s for room: %s", sid, room)
             except Exception as e:
-                self.logger.error(f"Update request error: {str(e)}")
+                self._err("Update request error: %s", e)
     
     def emit_bot_detection(self, bot_data):
         """Emit new bot detection to all dashboard subscribers"""
         try:
-            event_data = {
-                'type': 'bot_detection',
-                'data': bot_data,
-                'timestamp': datetime.datetime.utcnow().isoformat()
-            }
-            self.socketio.emit('bot_detection', event_data, room='dashboard')
-            self.logger.info(f"Emitted bot detection: {bot_data['fingerprint_hash']}")
+            self._emit_event('bot_detection', bot_data, room=ROOM_DASHBOARD)
+            if self._info_on:
+                self._info("Emitted bot detection: %s", bot_data['fingerprint_hash'])
         except Exception as e:
-            self.logger.error(f"Bot detection emission error: {str(e)}")
+            self._err("Bot detection emission error: %s", e)
     
-    def emit_dashboard_update(self, room='dashboard'):
+    def emit_dashboard_update(self, room=ROOM_DASHBOARD):
         """Emit comprehensive dashboard update"""
         try:
-            update_data = {
-                'type': 'dashboard_update',
-                'data': {
-                    'timestamp': datetime.datetime.utcnow().isoformat()
-                }
-            }
-            self.socketio.emit('dashboard_update', update_data, room=room)
-            self.logger.info(f"Dashboard update emitted to room: {room}")
+            self._emit_event('dashboard_update', None, room=room)
+            if self._info_on:
+                self._info("Dashboard update emitted to room: %s", room)
         except Exception as e:
-            self.logger.error(f"Dashboard update emission error: {str(e)}")
+            self._err("Dashboard update emission error: %s", e)
     
     def emit_system_alert(self, alert_data):
         """Emit system alert"""
         try:
-            event_data = {
-                'type': 'system_alert',
-                'data': alert_data,
-                'timestamp': datetime.datetime.utcnow().isoformat()
-            }
-            self.socketio.emit('system_alert', event_data, room='dashboard')
-            self.logger.info(f"System alert emitted: {alert_data.get('message')}")
+            self._emit_event('system_alert', alert_data, room=ROOM_DASHBOARD)
+            if self._info_on:
+                self._info("System alert emitted: %s", alert_data.get('message'))
         except Exception as e:
-            self.logger.error(f"System alert emission error: {str(e)}")
+            self._err("System alert emission error: %s", e)
     
     def emit_log_entry(self, log_data):
         """Emit new log entry"""
         try:
-            event_data = {
-                'type': 'log_entry',
-                'data': log_data,
-                'timestamp': datetime.datetime.utcnow().isoformat()
-            }
-            self.socketio.emit('log_entry', event_data, room='logs')
-            self.logger.debug(f"Log entry emitted: {log_data.get('message')}")
+            self._emit_event('log_entry', log_data, room=ROOM_LOGS)
+            if self._dbg_on:
+                self._dbg("Log entry emitted: %s", log_data.get('message'))
         except Exception as e:
-            self.logger.error(f"Log entry emission error: {str(e)}")
+            self._err("Log entry emission error: %s", e)
     
-    def broadcast_connection_count(self):
+    async def broadcast_connection_count(self):
         """Broadcast current connection count"""
         try:
             count_data = {
-                'connected_clients': len(self.connected_clients),
+                'connected_clients': self._client_count,
                 'timestamp': datetime.datetime.utcnow().isoformat()
             }
-            self.socketio.emit('connection_count', count_data, room='dashboard')
+            await self.socketio.emit('connection_count', count_data, room=ROOM_DASHBOARD)
         except Exception as e:
-            self.logger.error(f"Connection count broadcast error: {str(e)}")
+            self._err("Connection count broadcast error: %s", e)
 ```
 
 ```javascript
\ No newline at end of file
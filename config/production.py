@@ -4,131 +4,383 @@ Production configuration for Quantum Deception Nexus.
 Environment-based configuration loading and security settings.
 """
 
+import hashlib
 import os
-from typing import Dict, List, Optional
+import re
+from array import array
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Final, FrozenSet, Optional, Tuple
 
+import ahocorasick
+from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy.engine import URL, make_url
+
+from honeypot.write_buffer import SQLITE_PRAGMAS as _SQLITE_PRAGMAS
+
+
+def _to_bool(value: str) -> bool:
+    # Accepts true/yes/1/t/y in any case without allocating a lowered copy
+    return bool(value) and value[0] in 'tTyY1'
+
+
+# Separator for list-valued settings: commas and/or whitespace
+_SPLIT: Final = re.compile(r'[,\s]+')
+
+
+def _to_str_set(value: str) -> FrozenSet[str]:
+    return frozenset(p for p in _SPLIT.split(value) if p)
+
+
+def _to_int_set(value: str) -> FrozenSet[int]:
+    return frozenset(int(p) for p in _SPLIT.split(value) if p)
+
+
+# Coercion applied to an environment string for each field type
+_COERCERS: Final[Dict[Any, Callable[[str], Any]]] = {
+    int: int,
+    float: float,
+    bool: _to_bool,
+    str: str,
+    Optional[str]: str,
+    FrozenSet[str]: _to_str_set,
+    FrozenSet[int]: _to_int_set,
+}
+
+# Default for every environment-driven setting, already of the field's type;
+# only values taken from the environment go through _COERCERS. Optional
+# settings use a default of None and are left as None when unset.
+_ENV_DEFAULTS: Final[Dict[str, Any]] = {
+    # Security settings
+    'SECRET_KEY': 'change-this-in-production',
+    'JWT_SECRET_KEY': 'change-this-jwt-key-in-production',
+
+    # Database configuration
+    'DATABASE_URL': 'sqlite:///quantum_nexus.db',
+    'DATABASE_POOL_SIZE': 20,
+    'DATABASE_MAX_OVERFLOW': 10,
+    'DATABASE_POOL_TIMEOUT': 30,
+    'DATABASE_POOL_RECYCLE': 3600,
+    'DATABASE_READ_POOL_SIZE': os.cpu_count() or 4,
+    'DATABASE_WRITE_POOL_SIZE': 1,
+    # 'relaxed' skips fsync on honeypot event tables and checkpoints the WAL
+    # every few seconds; a crash may lose the most recent events
+    'DATABASE_DURABILITY': 'normal',
+
+    # Redis configuration (for rate limiting and caching)
+    'REDIS_URL': 'redis://localhost:6379/0',
+
+    # CORS settings
+    'CORS_ORIGINS': frozenset({'*'}),
+
+    # SSL/TLS configuration
+    'SSL_ENABLED': False,
+    'SSL_CERT_FILE': None,
+    'SSL_KEY_FILE': None,
+
+    # Rate limiting configuration
+    'RATELIMIT_DEFAULT': '200 per minute',
+    'RATELIMIT_STORAGE_URL': 'redis://localhost:6379/1',
+
+    # Logging configuration
+    'LOG_LEVEL': 'INFO',
+    'LOG_FORMAT': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    'LOG_FILE': None,
+    'LOG_MAX_BYTES': 10_485_760,  # 10MB
+    'LOG_BACKUP_COUNT': 5,
+    'LOG_BATCH_SIZE': 64,
+    'LOG_FLUSH_INTERVAL_MS': 250,
+    'LOG_DB_CONNECTION_REUSE': True,
+
+    # Honeypot settings
+    'HONEYPOT_PORTS': frozenset({80, 443, 22, 21}),
+    'HONEYPOT_DOMAINS': frozenset({'example.com', 'secure.net'}),
+    'DETECTION_THRESHOLD': 0.7,
+    'MAX_CONCURRENT_BOTS': 100,
+
+    # Challenge settings
+    'CHALLENGE_DIFFICULTY': 'medium',
+    'CHALLENGE_TIME_LIMIT': 300,
+    'CHALLENGE_RETRY_ATTEMPTS': 3,
+
+    # Verification settings
+    'CONSENSUS_THRESHOLD': 0.8,
+    'WORKER_RELIABILITY_SCORE': 0.9,
+    'VERIFICATION_TIMEOUT': 60,
+    'MAX_VERIFICATION_WORKERS': 10,
+
+    # Sandbox settings
+    'SANDBOX_CPU_LIMIT': 50,
+    'SANDBOX_MEMORY_LIMIT': 512,
+    'SANDBOX_TIMEOUT': 300,
+    'NETWORK_ISOLATION': 'partial',
+
+    # Alert settings
+    'ALERT_EMAIL': None,
+    'ALERT_WEBHOOK_URL': None,
+    'ALERT_THRESHOLD': 'medium',
+    'SLACK_ENABLED': False,
+
+    # Backup settings
+    'BACKUP_ENABLED': True,
+    'BACKUP_SCHEDULE': '0 2 * * *',  # Daily at 2 AM
+    'BACKUP_RETENTION_DAYS': 30,
+}
+
+def _env_snapshot() -> MappingProxyType:
+    return MappingProxyType({k: v for k, v in os.environ.items() if k in _ENV_DEFAULTS})
+
+
+def _env_fingerprint(env: MappingProxyType) -> bytes:
+    """Digest of the configuration variables, used to skip no-op reloads."""
+    h = hashlib.blake2b(digest_size=16)
+    for key in sorted(env):
+        h.update(key.encode())
+        h.update(b'=')
+        h.update(env[key].encode())
+        h.update(b'\n')
+    return h.digest()
+
+
+# Read-only snapshot of the configuration variables, taken once at import so
+# forked workers share the parsed values instead of re-reading the environment.
+# Replaced only by reload_config().
+_ENV = _env_snapshot()
+_CURRENT_FP = _env_fingerprint(_ENV)
+
+# (failed, message) pairs checked by ProductionConfig.validate, in report order
+_RULES: Final[Tuple[Tuple[Callable[[Any], bool], str], ...]] = (
+    # Required security settings
+    (lambda c: c.SECRET_KEY == 'change-this-in-production',
+     "SECRET_KEY must be changed in production"),
+    (lambda c: c.JWT_SECRET_KEY == 'change-this-jwt-key-in-production',
+     "JWT_SECRET_KEY must be changed in production"),
+
+    # SSL configuration
+    (lambda c: c.SSL_ENABLED and (not c.SSL_CERT_FILE or not c.SSL_KEY_FILE),
+     "SSL_CERT_FILE and SSL_KEY_FILE must be set when SSL is enabled"),
+
+    # Database settings
+    (lambda c: c.DATABASE_DURABILITY not in ('normal', 'relaxed'),
+     "DATABASE_DURABILITY must be 'normal' or 'relaxed'"),
+    (lambda c: c.DATABASE_READ_POOL_SIZE < 1 or c.DATABASE_WRITE_POOL_SIZE < 1,
+     "DATABASE_READ_POOL_SIZE and DATABASE_WRITE_POOL_SIZE must be at least 1"),
+
+    # Honeypot settings
+    (lambda c: not c.HONEYPOT_PORTS, "HONEYPOT_PORTS must be configured"),
+    (lambda c: not c.HONEYPOT_DOMAINS, "HONEYPOT_DOMAINS must be configured"),
+
+    # Thresholds
+    (lambda c: not 0 <= c.DETECTION_THRESHOLD <= 1,
+     "DETECTION_THRESHOLD must be between 0 and 1"),
+    (lambda c: not 0 <= c.CONSENSUS_THRESHOLD <= 1,
+     "CONSENSUS_THRESHOLD must be between 0 and 1"),
+    (lambda c: not 0 <= c.WORKER_RELIABILITY_SCORE <= 1,
+     "WORKER_RELIABILITY_SCORE must be between 0 and 1"),
+)
+
+# Validation results keyed by ProductionConfig._fingerprint; identical
+# settings are only checked once per process
+_VALIDATION_CACHE: Final[Dict[bytes, Tuple[str, ...]]] = {}
+
+@dataclass(frozen=True, slots=True, kw_only=True)
 class ProductionConfig:
-    """Production configuration class."""
-    
+    """Production configuration class.
+
+    A single immutable instance is built from the environment at import time
+    and shared as ``CONFIG``.
+    """
+
     # Security settings
-    SECRET_KEY: str = os.environ.get('SECRET_KEY', 'change-this-in-production')
-    JWT_SECRET_KEY: str = os.environ.get('JWT_SECRET_KEY', 'change-this-jwt-key-in-production')
-    
+    SECRET_KEY: str
+    JWT_SECRET_KEY: str
+
     # Database configuration
-    DATABASE_URL: str = os.environ.get('DATABASE_URL', 'sqlite:///quantum_nexus.db')
-    DATABASE_POOL_SIZE: int = int(os.environ.get('DATABASE_POOL_SIZE', '20'))
-    DATABASE_MAX_OVERFLOW: int = int(os.environ.get('DATABASE_MAX_OVERFLOW', '10'))
-    
+    DATABASE_URL: str
+    DATABASE_POOL_SIZE: int
+    DATABASE_MAX_OVERFLOW: int
+    DATABASE_POOL_TIMEOUT: int
+    DATABASE_POOL_RECYCLE: int
+    DATABASE_READ_POOL_SIZE: int
+    DATABASE_WRITE_POOL_SIZE: int
+    DATABASE_DURABILITY: str
+    # Applied to every SQLite connection when it is opened
+    SQLITE_PRAGMAS: Tuple[str, ...] = _SQLITE_PRAGMAS
+
     # Redis configuration (for rate limiting and caching)
-    REDIS_URL: str = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
-    
+    REDIS_URL: str
+
     # CORS settings
-    CORS_ORIGINS: List[str] = os.environ.get('CORS_ORIGINS', '*').split(',')
-    CORS_METHODS: List[str] = ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']
-    CORS_HEADERS: List[str] = ['Content-Type', 'Authorization', 'X-CSRF-Token']
-    
+    CORS_ORIGINS: FrozenSet[str]
+    CORS_METHODS: Tuple[str, ...] = ('GET', 'POST', 'PUT', 'DELETE', 'OPTIONS')
+    CORS_HEADERS: Tuple[str, ...] = ('Content-Type', 'Authorization', 'X-CSRF-Token')
+
     # SSL/TLS configuration
-    SSL_ENABLED: bool = os.environ.get('SSL_ENABLED', 'False').lower() == 'true'
-    SSL_CERT_FILE: Optional[str] = os.environ.get('SSL_CERT_FILE')
-    SSL_KEY_FILE: Optional[str] = os.environ.get('SSL_KEY_FILE')
-    
+    SSL_ENABLED: bool
+    SSL_CERT_FILE: Optional[str]
+    SSL_KEY_FILE: Optional[str]
+
     # Rate limiting configuration
-    RATELIMIT_DEFAULT: str = os.environ.get('RATELIMIT_DEFAULT', '200 per minute')
-    RATELIMIT_STORAGE_URL: str = os.environ.get('RATELIMIT_STORAGE_URL', 'redis://localhost:6379/1')
-    
+    RATELIMIT_DEFAULT: str
+    RATELIMIT_STORAGE_URL: str
+
     # Logging configuration
-    LOG_LEVEL: str = os.environ.get('LOG_LEVEL', 'INFO')
-    LOG_FORMAT: str = os.environ.get(
-        'LOG_FORMAT',
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    LOG_FILE: Optional[str] = os.environ.get('LOG_FILE')
-    LOG_MAX_BYTES: int = int(os.environ.get('LOG_MAX_BYTES', '10485760'))  # 10MB
-    LOG_BACKUP_COUNT: int = int(os.environ.get('LOG_BACKUP_COUNT', '5'))
-    
+    LOG_LEVEL: str
+    LOG_FORMAT: str
+    LOG_FILE: Optional[str]
+    LOG_MAX_BYTES: int
+    LOG_BACKUP_COUNT: int
+    # Database log writers buffer rows and insert them in batches
+    LOG_BATCH_SIZE: int
+    LOG_FLUSH_INTERVAL_MS: int
+    LOG_DB_CONNECTION_REUSE: bool
+
     # API settings
-    API_KEYS: Dict[str, Dict] = {
+    API_KEYS: Dict[str, Dict] = field(default_factory=lambda: {
         # Example API key - replace with actual keys in production
         # os.environ.get('EXAMPLE_API_KEY', 'example-key'): {
         #     'name': 'Example Integration',
         #     'permissions': ['read', 'write']
         # }
-    }
-    
+    })
+
     # Honeypot settings
-    HONEYPOT_PORTS: List[int] = [int(p) for p in os.environ.get('HONEYPOT_PORTS', '80,443,22,21').split(',')]
-    HONEYPOT_DOMAINS: List[str] = os.environ.get('HONEYPOT_DOMAINS', 'example.com,secure.net').split(',')
-    DETECTION_THRESHOLD: float = float(os.environ.get('DETECTION_THRESHOLD', '0.7'))
-    MAX_CONCURRENT_BOTS: int = int(os.environ.get('MAX_CONCURRENT_BOTS', '100'))
-    
+    HONEYPOT_PORTS: FrozenSet[int]
+    HONEYPOT_DOMAINS: FrozenSet[str]
+    DETECTION_THRESHOLD: float
+    MAX_CONCURRENT_BOTS: int
+
     # Challenge settings
-    CHALLENGE_DIFFICULTY: str = os.environ.get('CHALLENGE_DIFFICULTY', 'medium')
-    CHALLENGE_TIME_LIMIT: int = int(os.environ.get('CHALLENGE_TIME_LIMIT', '300'))
-    CHALLENGE_RETRY_ATTEMPTS: int = int(os.environ.get('CHALLENGE_RETRY_ATTEMPTS', '3'))
-    
+    CHALLENGE_DIFFICULTY: str
+    CHALLENGE_TIME_LIMIT: int
+    CHALLENGE_RETRY_ATTEMPTS: int
+
     # Verification settings
-    CONSENSUS_THRESHOLD: float = float(os.environ.get('CONSENSUS_THRESHOLD', '0.8'))
-    WORKER_RELIABILITY_SCORE: float = float(os.environ.get('WORKER_RELIABILITY_SCORE', '0.9'))
-    VERIFICATION_TIMEOUT: int = int(os.environ.get('VERIFICATION_TIMEOUT', '60'))
-    MAX_VERIFICATION_WORKERS: int = int(os.environ.get('MAX_VERIFICATION_WORKERS', '10'))
-    
+    CONSENSUS_THRESHOLD: float
+    WORKER_RELIABILITY_SCORE: float
+    VERIFICATION_TIMEOUT: int
+    MAX_VERIFICATION_WORKERS: int
+
     # Sandbox settings
-    SANDBOX_CPU_LIMIT: int = int(os.environ.get('SANDBOX_CPU_LIMIT', '50'))
-    SANDBOX_MEMORY_LIMIT: int = int(os.environ.get('SANDBOX_MEMORY_LIMIT', '512'))
-    SANDBOX_TIMEOUT: int = int(os.environ.get('SANDBOX_TIMEOUT', '300'))
-    NETWORK_ISOLATION: str = os.environ.get('NETWORK_ISOLATION', 'partial')
-    
+    SANDBOX_CPU_LIMIT: int
+    SANDBOX_MEMORY_LIMIT: int
+    SANDBOX_TIMEOUT: int
+    NETWORK_ISOLATION: str
+
     # Alert settings
-    ALERT_EMAIL: Optional[str] = os.environ.get('ALERT_EMAIL')
-    ALERT_WEBHOOK_URL: Optional[str] = os.environ.get('ALERT_WEBHOOK_URL')
-    ALERT_THRESHOLD: str = os.environ.get('ALERT_THRESHOLD', 'medium')
-    SLACK_ENABLED: bool = os.environ.get('SLACK_ENABLED', 'False').lower() == 'true'
-    
+    ALERT_EMAIL: Optional[str]
+    ALERT_WEBHOOK_URL: Optional[str]
+    ALERT_THRESHOLD: str
+    SLACK_ENABLED: bool
+
     # Backup settings
-    BACKUP_ENABLED: bool = os.environ.get('BACKUP_ENABLED', 'True').lower() == 'true'
-    BACKUP_SCHEDULE: str = os.environ.get('BACKUP_SCHEDULE', '0 2 * * *')  # Daily at 2 AM
-    BACKUP_RETENTION_DAYS: int = int(os.environ.get('BACKUP_RETENTION_DAYS', '30'))
-    
-    @classmethod
-    def validate(cls):
+    BACKUP_ENABLED: bool
+    BACKUP_SCHEDULE: str
+    BACKUP_RETENTION_DAYS: int
+
+    # Derived settings, computed in __post_init__
+    HONEYPOT_PORTS_ARRAY: array = field(init=False, compare=False)
+    BACKUP_TRIGGER: CronTrigger = field(init=False, repr=False, compare=False)
+    # Aho-Corasick automaton over the lowercased HONEYPOT_DOMAINS, or None
+    # when no domains are configured; see is_honeypot_host()
+    HONEYPOT_DOMAIN_MATCHER: Optional[ahocorasick.Automaton] = field(init=False, repr=False, compare=False)
+    # Parsed DATABASE_URL and matching create_engine() keyword arguments, for
+    # create_engine(CONFIG.DATABASE_URL_OBJ, **CONFIG.DATABASE_ENGINE_OPTIONS)
+    DATABASE_URL_OBJ: URL = field(init=False, repr=False, compare=False)
+    DATABASE_ENGINE_OPTIONS: MappingProxyType = field(init=False, repr=False, compare=False)
+    # Ready-made Access-Control-Allow-Methods / -Headers values
+    CORS_METHODS_HEADER: str = field(init=False, compare=False)
+    CORS_HEADERS_HEADER: str = field(init=False, compare=False)
+
+    # Digest of the settings, used to key the validation cache
+    _fingerprint: bytes = field(default=b'', init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Sorted, packed unsigned-short copy of HONEYPOT_PORTS for ordered iteration
+        object.__setattr__(self, 'HONEYPOT_PORTS_ARRAY', array('H', sorted(self.HONEYPOT_PORTS)))
+        # BACKUP_SCHEDULE parsed once so the scheduler never re-reads the cron string
+        object.__setattr__(self, 'BACKUP_TRIGGER', CronTrigger.from_crontab(self.BACKUP_SCHEDULE))
+        matcher = None
+        if self.HONEYPOT_DOMAINS:
+            matcher = ahocorasick.Automaton()
+            for domain in self.HONEYPOT_DOMAINS:
+                matcher.add_word(domain.lower(), domain)
+            matcher.make_automaton()
+        object.__setattr__(self, 'HONEYPOT_DOMAIN_MATCHER', matcher)
+        url = make_url(self.DATABASE_URL)
+        object.__setattr__(self, 'DATABASE_URL_OBJ', url)
+        engine_options = {
+            'pool_recycle': self.DATABASE_POOL_RECYCLE,
+            'pool_pre_ping': True,
+        }
+        if url.drivername.startswith('sqlite'):
+            # In-memory databases get SingletonThreadPool/StaticPool, which
+            # reject the QueuePool sizing arguments
+            if url.database not in (None, '', ':memory:') and url.query.get('mode') != 'memory':
+                # SQLite allows a single writer; extra pooled connections only
+                # turn into "database is locked" errors under write load
+                engine_options.update(pool_size=1, max_overflow=0, pool_timeout=self.DATABASE_POOL_TIMEOUT)
+        else:
+            engine_options.update(
+                pool_size=self.DATABASE_POOL_SIZE,
+                max_overflow=self.DATABASE_MAX_OVERFLOW,
+                pool_timeout=self.DATABASE_POOL_TIMEOUT,
+            )
+        object.__setattr__(self, 'DATABASE_ENGINE_OPTIONS', MappingProxyType(engine_options))
+        object.__setattr__(self, 'CORS_METHODS_HEADER', ', '.join(self.CORS_METHODS))
+        object.__setattr__(self, 'CORS_HEADERS_HEADER', ', '.join(self.CORS_HEADERS))
+        settings = repr([(f.name, getattr(self, f.name)) for f in fields(self) if f.init])
+        object.__setattr__(self, '_fingerprint', hashlib.blake2b(settings.encode(), digest_size=16).digest())
+
+    def is_honeypot_host(self, host: str) -> bool:
+        """Return True if ``host`` contains any configured honeypot domain."""
+        matcher = self.HONEYPOT_DOMAIN_MATCHER
+        if matcher is None:
+            return False
+        for _ in matcher.iter(host.lower()):
+            return True
+        return False
+
+    def validate(self):
         """Validate configuration settings."""
-        errors = []
-        
-        # Validate required security settings
-        if cls.SECRET_KEY == 'change-this-in-production':
-            errors.append("SECRET_KEY must be changed in production")
-            
-        if cls.JWT_SECRET_KEY == 'change-this-jwt-key-in-production':
-            errors.append("JWT_SECRET_KEY must be changed in production")
-            
-        # Validate SSL configuration
-        if cls.SSL_ENABLED and (not cls.SSL_CERT_FILE or not cls.SSL_KEY_FILE):
-            errors.append("SSL_CERT_FILE and SSL_KEY_FILE must be set when SSL is enabled")
-            
-        # Validate honeypot settings
-        if not cls.HONEYPOT_PORTS:
-            errors.append("HONEYPOT_PORTS must be configured")
-            
-        if not cls.HONEYPOT_DOMAINS:
-            errors.append("HONEYPOT_DOMAINS must be configured")
-            
-        # Validate thresholds
-        if not 0 <= cls.DETECTION_THRESHOLD <= 1:
-            errors.append("DETECTION_THRESHOLD must be between 0 and 1")
-            
-        if not 0 <= cls.CONSENSUS_THRESHOLD <= 1:
-            errors.append("CONSENSUS_THRESHOLD must be between 0 and 1")
-            
-        if not 0 <= cls.WORKER_RELIABILITY_SCORE <= 1:
-            errors.append("WORKER_RELIABILITY_SCORE must be between 0 and 1")
-            
-        return errors
+        errors = _VALIDATION_CACHE.get(self._fingerprint)
+        if errors is None:
+            errors = tuple(message for failed, message in _RULES if failed(self))
+            _VALIDATION_CACHE[self._fingerprint] = errors
+        return list(errors)
+
+def _load_from_env() -> Dict[str, Any]:
+    """Read every environment-driven setting in a single pass."""
+    env = _ENV
+    values = {}
+    for f in fields(ProductionConfig):
+        if f.name not in _ENV_DEFAULTS:
+            continue
+        raw = env.get(f.name)
+        values[f.name] = _ENV_DEFAULTS[f.name] if raw is None else _COERCERS[f.type](raw)
+    return values
+
+
+# Process-wide configuration; hot paths can import CONFIG directly, but only
+# get_config() observes a rebuild by reload_config()
+CONFIG: ProductionConfig = ProductionConfig(**_load_from_env())
 
 # Convenience function to get configuration
 def get_config() -> ProductionConfig:
     """Get production configuration instance."""
-    return ProductionConfig()
+    return CONFIG
+
+def reload_config() -> ProductionConfig:
+    """Rebuild the configuration if its environment variables changed (e.g. on SIGHUP)."""
+    global _ENV, _CURRENT_FP, CONFIG
+    env = _env_snapshot()
+    fingerprint = _env_fingerprint(env)
+    if fingerprint == _CURRENT_FP:
+        return CONFIG
+    _ENV, _CURRENT_FP = env, fingerprint
+    CONFIG = ProductionConfig(**_load_from_env())
+    return CONFIG
 
 # Export for module usage
-__all__ = ["ProductionConfig", "get_config"]
-```
\ No newline at end of file
+__all__ = ["CONFIG", "ProductionConfig", "get_config", "reload_config"]
+```
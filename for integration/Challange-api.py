@@ -8,26 +8,41 @@ from challenge_metrics import classify_bot_capabilities
 from challenge_verify import verify_hmac
 from fingerprint_core import get_bot_fingerprint
 from functools import wraps
+import os
+import time
+import uuid
+import redis
+from cachetools import TTLCache
 
 app = Flask(__name__)
 framework = ChallengeFramework()
 SECRET_KEY = 'your_secret_key'
 
+# Shared connection pool for the rate limiter (same setting as ProductionConfig.RATELIMIT_STORAGE_URL)
+rate_limit_store = redis.Redis.from_url(os.environ.get('RATELIMIT_STORAGE_URL', 'redis://localhost:6379/1'))
+
+# In-process record of IPs already over their limit (ip -> blocked until), so floods skip the Redis round trip
+_BLOCKED = TTLCache(maxsize=10_000, ttl=60)
+
 def rate_limit(limit, period):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             ip = request.remote_addr
             key = f"rate_limit:{ip}"
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT count(*) FROM rate_limits WHERE ip = ? AND timestamp >= ?", (ip, int(time.time()) - period))
-            count = cursor.fetchone()[0]
-            if count >= limit:
+            now = time.time()
+            if _BLOCKED.get(ip, 0) > now:
+                return jsonify({"error": "Rate limit exceeded"}), 429
+            # Sliding window: drop hits older than the period, record this one and count, in one round trip
+            pipe = rate_limit_store.pipeline()
+            pipe.zremrangebyscore(key, 0, now - period)
+            pipe.zadd(key, {uuid.uuid4().hex: now})
+            pipe.zcard(key)
+            pipe.expire(key, period)
+            count = pipe.execute()[2]
+            if count > limit:
+                _BLOCKED[ip] = now + period
                 return jsonify({"error": "Rate limit exceeded"}), 429
-            cursor.execute("INSERT INTO rate_limits (ip, timestamp) VALUES (?, ?)", (ip, int(time.time())))
-            conn.commit()
-            conn.close()
             return f(*args, **kwargs)
         return decorated_function
     return decorator
@@ -93,7 +108,7 @@ if __name__ == '__main__':
 ```
 
 ### Additional Notes:
-- **SQLite Database Schema**: Ensure you have the necessary tables in your SQLite database (`challenges`, `responses`, `metrics`, `rate_limits`).
+- **SQLite Database Schema**: Ensure you have the necessary tables in your SQLite database (`challenges`, `responses`, `metrics`). Rate limiting uses Redis at `RATELIMIT_STORAGE_URL`.
 - **Error Handling**: Each function includes basic error handling with `try/except` blocks.
 - **Cryptography**: Use HMAC verification to prevent challenge tampering.
 - **Input Sanitization**: Implement proper input sanitization for all API endpoints.
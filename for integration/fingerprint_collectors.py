@@ -6,9 +6,12 @@ import hashlib
 import json
 import logging
 import os
+import queue
 import sqlite3
+import threading
 import time
-from flask import request
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import copy_current_request_context, request
 from psutil import sensors_battery
 
 # Set up logging
@@ -23,6 +26,25 @@ TABLE_DEVICE_FINGERPRINTS = 'device_fingerprints'
 TABLE_BOT_VISITS = 'bot_visits'
 TABLE_BOT_WORK = 'bot_work'
 
+
+def _to_bool(value: str) -> bool:
+    # Same rule as config/production.py: true/yes/1/t/y in any case
+    return bool(value) and value[0] in 'tTyY1'
+
+
+# Batched log writer settings (see ProductionConfig)
+LOG_BATCH_SIZE = int(os.environ.get('LOG_BATCH_SIZE', '64'))
+LOG_FLUSH_INTERVAL_MS = int(os.environ.get('LOG_FLUSH_INTERVAL_MS', '250'))
+LOG_DB_CONNECTION_REUSE = _to_bool(os.environ.get('LOG_DB_CONNECTION_REUSE', 'True'))
+
+# Insert statements for the batched fingerprint logs
+INSERT_BROWSER_FINGERPRINT = f'INSERT INTO {TABLE_BROWSER_FINGERPRINTS} (ip, timestamp, user_agent, webgl, canvas, fonts, js_behavior, audio_context) VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+INSERT_NETWORK_FINGERPRINT = f'INSERT INTO {TABLE_NETWORK_FINGERPRINTS} (ip, timestamp, tcp_stack, connection_timing, http_headers, tls_ciphers) VALUES (?, ?, ?, ?, ?, ?)'
+INSERT_DEVICE_FINGERPRINT = f'INSERT INTO {TABLE_DEVICE_FINGERPRINTS} (ip, timestamp, screen_resolution, color_depth, hardware_benchmarks, sensors, battery_status) VALUES (?, ?, ?, ?, ?, ?, ?)'
+
+# Pending (insert_sql, row) pairs, written by _log_writer
+_buf = queue.Queue()
+
 # Initialize database
 def init_db():
     conn = sqlite3.connect(DB_NAME)
@@ -31,7 +53,7 @@ def init_db():
         CREATE TABLE IF NOT EXISTS {TABLE_BROWSER_FINGERPRINTS} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             ip TEXT,
-            timestamp TEXT,
+            timestamp INTEGER,
             user_agent TEXT,
             webgl TEXT,
             canvas TEXT,
@@ -44,7 +66,7 @@ def init_db():
         CREATE TABLE IF NOT EXISTS {TABLE_NETWORK_FINGERPRINTS} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             ip TEXT,
-            timestamp TEXT,
+            timestamp INTEGER,
             tcp_stack TEXT,
             connection_timing TEXT,
             http_headers TEXT,
@@ -55,7 +77,7 @@ def init_db():
         CREATE TABLE IF NOT EXISTS {TABLE_DEVICE_FINGERPRINTS} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             ip TEXT,
-            timestamp TEXT,
+            timestamp INTEGER,
             screen_resolution TEXT,
             color_depth TEXT,
             hardware_benchmarks TEXT,
@@ -67,53 +89,75 @@ def init_db():
         CREATE TABLE IF NOT EXISTS {TABLE_BOT_VISITS} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             ip TEXT,
-            timestamp TEXT,
+            timestamp INTEGER,
             user_agent TEXT
         )
     ''')
     cursor.execute(f'''
         CREATE TABLE IF NOT EXISTS {TABLE_BOT_WORK} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
+            timestamp INTEGER,
             bot_ip TEXT,
             result REAL
         )
     ''')
+    # Rows written before timestamps became epoch seconds hold local-time
+    # strings; convert them once so the column has a single type
+    for table in (TABLE_BROWSER_FINGERPRINTS, TABLE_NETWORK_FINGERPRINTS, TABLE_DEVICE_FINGERPRINTS,
+                  TABLE_BOT_VISITS, TABLE_BOT_WORK):
+        cursor.execute(
+            f"UPDATE {table} SET timestamp = CAST(strftime('%s', timestamp, 'utc') AS INTEGER) "
+            "WHERE typeof(timestamp) = 'text'"
+        )
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_bot_work_ip ON {TABLE_BOT_WORK}(bot_ip)')
     conn.commit()
     conn.close()
 
+# Background writer: drains _buf and inserts each batch with executemany in one transaction
+def _log_writer():
+    conn = None
+    while True:
+        item = _buf.get()
+        batch = [item]
+        deadline = time.monotonic() + LOG_FLUSH_INTERVAL_MS / 1000
+        while len(batch) < LOG_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(_buf.get(timeout=timeout))
+            except queue.Empty:
+                break
+        rows_by_sql = {}
+        for sql, row in batch:
+            rows_by_sql.setdefault(sql, []).append(row)
+        try:
+            if conn is None:
+                conn = sqlite3.connect(DB_NAME)
+                conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                for sql, rows in rows_by_sql.items():
+                    conn.executemany(sql, rows)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to write {len(batch)} log rows: {e}")
+        finally:
+            if not LOG_DB_CONNECTION_REUSE and conn is not None:
+                conn.close()
+                conn = None
+
+threading.Thread(target=_log_writer, name='fingerprint-log-writer', daemon=True).start()
+
 # Log browser fingerprint data
 def log_browser_fingerprint(ip, user_agent, webgl, canvas, fonts, js_behavior, audio_context):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(f'''
-        INSERT INTO {TABLE_BROWSER_FINGERPRINTS} (ip, timestamp, user_agent, webgl, canvas, fonts, js_behavior, audio_context)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (ip, time.strftime('%Y-%m-%d %H:%M:%S'), user_agent, webgl, canvas, fonts, js_behavior, audio_context))
-    conn.commit()
-    conn.close()
+    _buf.put((INSERT_BROWSER_FINGERPRINT, (ip, int(time.time()), user_agent, webgl, canvas, fonts, js_behavior, audio_context)))
 
 # Log network fingerprint data
 def log_network_fingerprint(ip, tcp_stack, connection_timing, http_headers, tls_ciphers):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(f'''
-        INSERT INTO {TABLE_NETWORK_FINGERPRINTS} (ip, timestamp, tcp_stack, connection_timing, http_headers, tls_ciphers)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (ip, time.strftime('%Y-%m-%d %H:%M:%S'), tcp_stack, connection_timing, http_headers, tls_ciphers))
-    conn.commit()
-    conn.close()
+    _buf.put((INSERT_NETWORK_FINGERPRINT, (ip, int(time.time()), tcp_stack, connection_timing, http_headers, tls_ciphers)))
 
 # Log device fingerprint data
 def log_device_fingerprint(ip, screen_resolution, color_depth, hardware_benchmarks, sensors, battery_status):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(f'''
-        INSERT INTO {TABLE_DEVICE_FINGERPRINTS} (ip, timestamp, screen_resolution, color_depth, hardware_benchmarks, sensors, battery_status)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (ip, time.strftime('%Y-%m-%d %H:%M:%S'), screen_resolution, color_depth, hardware_benchmarks, sensors, battery_status))
-    conn.commit()
-    conn.close()
+    _buf.put((INSERT_DEVICE_FINGERPRINT, (ip, int(time.time()), screen_resolution, color_depth, hardware_benchmarks, sensors, battery_status)))
 
 # Collect WebGL capabilities
 def collect_webgl():
@@ -307,33 +351,47 @@ def collect_battery_status():
         logger.error(f"Error collecting battery status: {e}")
         return None
 
+# Shared pool for running a request's independent collectors concurrently
+_collector_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='fingerprint-collector')
+COLLECTOR_TIMEOUT = 2  # seconds allowed for one group of collectors
+
+# Run collectors in parallel within the current request context; a collector that
+# fails or misses the deadline contributes None
+def _run_collectors(*collectors):
+    futures = [_collector_pool.submit(copy_current_request_context(fn)) for fn in collectors]
+    wait(futures, timeout=COLLECTOR_TIMEOUT)
+    results = []
+    for fn, future in zip(collectors, futures):
+        if not future.done():
+            logger.error(f"Collector {fn.__name__} timed out")
+            results.append(None)
+        elif future.exception() is not None:
+            logger.error(f"Collector {fn.__name__} failed: {future.exception()}")
+            results.append(None)
+        else:
+            results.append(future.result())
+    return results
+
 # Main function to collect and log browser fingerprints
 def collect_and_log_browser_fingerprint():
     ip = request.remote_addr
     user_agent = request.user_agent.string
-    webgl = collect_webgl()
-    canvas = collect_canvas()
-    fonts = collect_fonts()
-    js_behavior = collect_js_behavior()
-    audio_context = collect_audio_context()
+    webgl, canvas, fonts, js_behavior, audio_context = _run_collectors(
+        collect_webgl, collect_canvas, collect_fonts, collect_js_behavior, collect_audio_context)
     log_browser_fingerprint(ip, user_agent, webgl, canvas, fonts, js_behavior, audio_context)
 
 # Main function to collect and log network fingerprints
 def collect_and_log_network_fingerprint():
     ip = request.remote_addr
-    tcp_stack = collect_tcp_stack()
-    connection_timing = collect_connection_timing()
-    http_headers = collect_http_headers()
-    tls_ciphers = collect_tls_ciphers()
+    tcp_stack, connection_timing, http_headers, tls_ciphers = _run_collectors(
+        collect_tcp_stack, collect_connection_timing, collect_http_headers, collect_tls_ciphers)
     log_network_fingerprint(ip, tcp_stack, connection_timing, http_headers, tls_ciphers)
 
 # Main function to collect and log device fingerprints
 def collect_and_log_device_fingerprint():
     ip = request.remote_addr
-    screen_info = collect_screen_info()
-    hardware_benchmarks = collect_hardware_benchmarks()
-    sensors = collect_sensors()
-    battery_status = collect_battery_status()
+    screen_info, hardware_benchmarks, sensors, battery_status = _run_collectors(
+        collect_screen_info, collect_hardware_benchmarks, collect_sensors, collect_battery_status)
     log_device_fingerprint(ip, screen_info, hardware_benchmarks, sensors, battery_status)
 
 # Initialize the database
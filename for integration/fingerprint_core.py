@@ -2,6 +2,10 @@ fingerprint_core.py`
 This file will contain the main functionality and API for the fingerprinting system.
 
 ```python
+import orjson
+import sqlite3
+import threading
+import time
 from flask import Flask, request
 from browser_fingerprint import collect_and_log_browser_fingerprint
 from network_fingerprint import collect_and_log_network_fingerprint
@@ -9,6 +13,27 @@ from device_fingerprint import collect_and_log_device_fingerprint
 
 app = Flask(__name__)
 
+# Per-thread database connection, opened once and reused across requests
+_db_local = threading.local()
+
+def get_db_connection():
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_NAME, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        _db_local.conn = conn
+    return conn
+
+# Honeypot page template, compiled on first use and reused for every render
+_honeypot_template = None
+
+def render_honeypot_page(task):
+    global _honeypot_template
+    if _honeypot_template is None:
+        _honeypot_template = app.jinja_env.from_string(HONEYPOT_TEMPLATE)
+    return _honeypot_template.render(task=orjson.dumps(task).decode())
+
 @app.route('/honeypot_page', methods=['GET'])
 def honeypot_page():
     # Log the visit
@@ -31,34 +56,22 @@ def honeypot_page():
         'numbers': [random.randint(1, 100) for _ in range(task_difficulty)],
         'redirect_url': url_for('submit_results')
     }
-    return render_template_string(HONEYPOT_TEMPLATE, task=json.dumps(task))
+    return render_honeypot_page(task)
 
 def log_visit(ip, user_agent):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(f'''
+    get_db_connection().execute(f'''
         INSERT INTO {TABLE_BOT_VISITS} (ip, timestamp, user_agent)
         VALUES (?, ?, ?)
-    ''', (ip, time.strftime('%Y-%m-%d %H:%M:%S'), user_agent))
-    conn.commit()
-    conn.close()
+    ''', (ip, int(time.time()), user_agent))
 
 def store_result(ip, result):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(f'''
+    get_db_connection().execute(f'''
         INSERT INTO {TABLE_BOT_WORK} (timestamp, bot_ip, result)
         VALUES (?, ?, ?)
-    ''', (time.strftime('%Y-%m-%d %H:%M:%S'), ip, result))
-    conn.commit()
-    conn.close()
+    ''', (int(time.time()), ip, result))
 
 def get_bot_type(ip):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(f'SELECT bot_type FROM {TABLE_BOT_WORK} WHERE bot_ip = ? LIMIT 1', (ip,))
-    bot_type = cursor.fetchone()
-    conn.close()
+    bot_type = get_db_connection().execute(f'SELECT bot_type FROM {TABLE_BOT_WORK} WHERE bot_ip = ? LIMIT 1', (ip,)).fetchone()
     return bot_type[0] if bot_type else 'slow'
 
 def adjust_task_difficulty(bot_type):
@@ -5,9 +5,8 @@ This file will contain the machine learning models and training logic.
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense
+from tensorflow.keras.layers import Dense, Normalization
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.losses import MeanSquaredError
 from stable_baselines3 import PPO
@@ -16,9 +15,13 @@ from stable_baselines3.common.vec_env import DummyVecEnv
 from stable_baselines3.common.monitor import Monitor
 
 # Define a supervised learning model using TensorFlow
-def create_supervised_model():
+def create_supervised_model(X_train):
+    # Feature scaling is part of the graph, so the model takes raw features
+    norm = Normalization(axis=-1, input_shape=(5,))
+    norm.adapt(np.asarray(X_train, dtype=np.float32))
     model = Sequential([
-        Dense(128, activation='relu', input_shape=(5,)),
+        norm,
+        Dense(128, activation='relu'),
         Dense(64, activation='relu'),
         Dense(32, activation='relu'),
         Dense(1, activation='linear')
@@ -36,8 +39,9 @@ def train_supervised_model(model, X_train, y_train, X_test, y_test):
 
 # Deploy the trained supervised model
 def deploy_supervised_model(model):
-    # Generate 5 new fake product prices
-    fake_prices = [model.predict(np.array([[np.random.uniform(1, 10), np.random.uniform(1, 10), np.random.uniform(1, 10), np.random.uniform(1, 10), np.random.uniform(1, 10)]]))[0][0] for _ in range(5)]
+    # Generate 5 new fake product prices in a single batched forward pass
+    batch = np.random.uniform(1, 10, size=(5, 5)).astype(np.float32)
+    fake_prices = model(batch, training=False).numpy().ravel()
     # Update Shopify store with new products
     session = Session(SHOPIFY_SHOP_NAME, ApiVersion.UNSET, f"{SHOPIFY_API_KEY}:{SHOPIFY_PASSWORD}")
     ShopifyResource.activate_session(session)
@@ -66,11 +70,24 @@ class HoneypotEnv(gym.Env):
         self.bot_data = bot_data
         self.action_space = gym.spaces.Discrete(4)  # Number of integers to sum (2-5)
         self.observation_space = gym.spaces.Box(low=0, high=1, shape=(3,), dtype=np.float32)
+        # Rows are drawn from a cached array by walking a shuffled permutation
+        self._rows = bot_data.select_dtypes(include='number').to_numpy(dtype=np.float32)
+        self._rng = np.random.default_rng()
+        self._perm = self._rng.permutation(len(self._rows))
+        self._cursor = 0
         self.state = None
         self.reset()
 
+    def _next_row(self):
+        if self._cursor >= len(self._perm):
+            self._rng.shuffle(self._perm)
+            self._cursor = 0
+        row = self._rows[self._perm[self._cursor]]
+        self._cursor += 1
+        return row
+
     def reset(self):
-        self.state = self.bot_data.sample(n=1).values[0]
+        self.state = self._next_row()
         return self.state
 
     def step(self, action):
@@ -82,7 +99,7 @@ class HoneypotEnv(gym.Env):
             reward = -0.5
         elif action == 2:  # High-value result
             reward = 2
-        self.state = self.bot_data.sample(n=1).values[0]
+        self.state = self._next_row()
         return self.state, reward, done, {}
 
 # Train the RL agent
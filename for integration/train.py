@@ -0,0 +1,236 @@
+import os
+import sqlite3
+import csv
+import logging
+import pandas as pd
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import Dense, Normalization
+from tensorflow.keras.optimizers import Adam
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_squared_error
+from concurrent.futures import ThreadPoolExecutor
+from stable_baselines3 import PPO
+from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.vec_env import DummyVecEnv
+from stable_baselines3.common.monitor import Monitor
+from dotenv import load_dotenv
+
+from honeypot import DB_NAME, TABLE_BOT_VISITS, TABLE_BOT_WORK, RESULTS_DIR, init_db
+
+# Offline training for the honeypot models, run separately from the server:
+#   python train.py && python honeypot.py
+
+# Load environment variables
+load_dotenv()
+
+# Configuration
+SHOPIFY_API_KEY = os.getenv('SHOPIFY_API_KEY')
+SHOPIFY_PASSWORD = os.getenv('SHOPIFY_PASSWORD')
+SHOPIFY_SHOP_NAME = os.getenv('SHOPIFY_SHOP_NAME')
+TFLITE_MODEL_PATH = os.path.join(RESULTS_DIR, 'bot_agent_model.tflite')
+FAKE_PRODUCT_COUNT = 5
+LOAD_CHUNK_SIZE = 50_000
+
+logger = logging.getLogger(__name__)
+
+# Load data from SQLite database
+def load_data():
+    conn = sqlite3.connect(DB_NAME)
+    visits_df = _read_query(conn, f'SELECT * FROM {TABLE_BOT_VISITS}', ('ip', 'user_agent'))
+    work_df = _read_query(conn, f'SELECT id, timestamp, bot_ip AS ip, result FROM {TABLE_BOT_WORK}', ('ip',))
+    conn.close()
+    return visits_df, work_df
+
+# Stream a query in chunks with parsed epoch timestamps and categorical text columns
+def _read_query(conn, query, categories):
+    chunks = pd.read_sql_query(query, conn, chunksize=LOAD_CHUNK_SIZE, parse_dates={'timestamp': {'unit': 's'}})
+    df = pd.concat(chunks, ignore_index=True, copy=False)
+    # Categories differ between chunks, so cast once the frame is complete
+    return df.astype({column: 'category' for column in categories})
+
+# Preprocess the data
+def preprocess_data(visits_df, work_df):
+    # load_data() supplies parsed timestamps and categorical IPs
+    # Request frequency (requests/min per IP) and time since last request (seconds)
+    per_minute = visits_df.groupby(['ip', pd.Grouper(key='timestamp', freq='1min')], observed=True).size()
+    visits_df = visits_df.sort_values('timestamp')
+    visits_df['gap'] = visits_df.groupby('ip', observed=True)['timestamp'].diff().dt.total_seconds()
+    visit_stats = visits_df.groupby('ip', observed=True).agg(time_since_last_request=('gap', 'last'))
+    visit_stats['avg_request_freq'] = per_minute.groupby(level='ip', observed=True).mean()
+    
+    # Task completion rate (valid results submitted per IP) and average result value
+    work_stats = work_df.groupby('ip', observed=True).agg(
+        task_completion_rate=('result', 'size'),
+        avg_result_value=('result', 'mean'),
+    )
+    
+    # Merge features
+    visit_stats.index = visit_stats.index.astype(object)
+    work_stats.index = work_stats.index.astype(object)
+    merged_df = visit_stats.join(work_stats, how='outer').fillna(0).rename_axis('ip').reset_index()
+    
+    # Bot type
+    merged_df['bot_type'] = np.where(merged_df['avg_request_freq'].values > 10, 'fast', 'slow')
+    merged_df['is_worker'] = (merged_df['task_completion_rate'].values > 0).astype(np.int8)
+    
+    return merged_df
+
+# Define a supervised learning model using TensorFlow
+def create_supervised_model(X_train):
+    # Feature scaling is part of the graph, so the model takes raw features
+    norm = Normalization(axis=-1, input_shape=(5,))
+    norm.adapt(np.asarray(X_train, dtype=np.float32))
+    model = Sequential([
+        norm,
+        Dense(128, activation='relu'),
+        Dense(64, activation='relu'),
+        Dense(32, activation='relu'),
+        Dense(1, activation='linear')
+    ])
+    model.compile(optimizer=Adam(learning_rate=0.001), loss='mse')
+    return model
+
+# Train the supervised model
+def train_supervised_model(model, X_train, y_train, X_test, y_test):
+    model.fit(X_train, y_train, epochs=20, batch_size=32, validation_data=(X_test, y_test))
+    y_pred = model.predict(X_test)
+    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    logger.info(f'Test RMSE: {rmse:.4f}')
+    return model
+
+# Export the trained supervised model as a dynamic-range quantized TFLite model
+def export_tflite_model(model, path=TFLITE_MODEL_PATH):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+    return path
+
+# Load a TFLite model with its tensors allocated for a fixed batch size
+def load_tflite_model(path=TFLITE_MODEL_PATH, batch_size=FAKE_PRODUCT_COUNT):
+    interpreter = tf.lite.Interpreter(model_path=path, num_threads=1)
+    input_index = interpreter.get_input_details()[0]['index']
+    interpreter.resize_tensor_input(input_index, [batch_size, 5])
+    interpreter.allocate_tensors()
+    return interpreter
+
+# Deploy the trained supervised model
+def deploy_supervised_model(interpreter):
+    # Generate fake product prices in a single batched invocation
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+    batch = np.random.uniform(1, 10, size=(FAKE_PRODUCT_COUNT, 5)).astype(np.float32)
+    interpreter.set_tensor(input_index, batch)
+    interpreter.invoke()
+    fake_prices = interpreter.get_tensor(output_index).ravel()
+    
+    # Update Shopify store with new products
+    session = Session(SHOPIFY_SHOP_NAME, ApiVersion.UNSET, f"{SHOPIFY_API_KEY}:{SHOPIFY_PASSWORD}")
+    ShopifyResource.activate_session(session)
+    
+    def create_product(price):
+        product = Product()
+        product.title = f'Fake Product {price:.2f}'
+        product.body_html = f'A fake product created by bots with price ${price:.2f}.'
+        product.variants = [{'price': str(price)}]
+        product.save()
+    
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        executor.map(create_product, fake_prices)
+    
+    ShopifyResource.clear_session()
+    
+    # Create SEO meta descriptions
+    descriptions = [f'Discover our exclusive deal: ${price:.2f} off on this product!' for price in fake_prices]
+    
+    # Save generated content to CSV
+    with open(os.path.join(RESULTS_DIR, 'agent_output.csv'), 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['product_title', 'description'])
+        for price in fake_prices:
+            writer.writerow([f'Fake Product {price:.2f}', f'Discover our exclusive deal: ${price:.2f} off on this product!'])
+
+# Define a custom environment for RL
+class HoneypotEnv(gym.Env):
+    def __init__(self, bot_data):
+        super(HoneypotEnv, self).__init__()
+        self.bot_data = bot_data
+        self.action_space = gym.spaces.Discrete(4)  # Number of integers to sum (2-5)
+        self.observation_space = gym.spaces.Box(low=0, high=1, shape=(3,), dtype=np.float32)
+        # Rows are drawn from a cached array by walking a shuffled permutation
+        self._rows = bot_data.select_dtypes(include='number').to_numpy(dtype=np.float32)
+        self._rng = np.random.default_rng()
+        self._perm = self._rng.permutation(len(self._rows))
+        self._cursor = 0
+        self.state = None
+        self.reset()
+    
+    def _next_row(self):
+        if self._cursor >= len(self._perm):
+            self._rng.shuffle(self._perm)
+            self._cursor = 0
+        row = self._rows[self._perm[self._cursor]]
+        self._cursor += 1
+        return row
+    
+    def reset(self):
+        self.state = self._next_row()
+        return self.state
+    
+    def step(self, action):
+        reward = 0
+        done = False
+        
+        if action == 0:  # Valid submission
+            reward = 1
+        elif action == 1:  # No submission
+            reward = -0.5
+        elif action == 2:  # High-value result
+            reward = 2
+        
+        self.state = self._next_row()
+        return self.state, reward, done, {}
+
+# Train the RL agent
+def train_rl_agent(bot_data):
+    env = make_vec_env(lambda: HoneypotEnv(bot_data), n_envs=1)
+    model = PPO('MlpPolicy', env, verbose=1)
+    model.learn(total_timesteps=20000)
+    model.save(os.path.join(RESULTS_DIR, 'bot_rl_agent.zip'))
+
+# Main function to run the training pipeline
+def main():
+    # Initialize database
+    init_db()
+    
+    # Load data
+    visits_df, work_df = load_data()
+    
+    # Preprocess data
+    merged_df = preprocess_data(visits_df, work_df)
+    
+    # Split data into features and target
+    X = merged_df[['avg_request_freq', 'task_completion_rate', 'avg_result_value', 'time_since_last_request', 'is_worker']]
+    y = merged_df['result']
+    
+    # Split data into training and testing sets
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    
+    # Create and train the supervised model
+    model = create_supervised_model(X_train)
+    model = train_supervised_model(model, X_train, y_train, X_test, y_test)
+    
+    # Save the trained model
+    model.save(os.path.join(RESULTS_DIR, 'bot_agent_model.h5'))
+    
+    # Deploy the supervised model through the quantized TFLite interpreter
+    export_tflite_model(model)
+    deploy_supervised_model(load_tflite_model())
+    
+    # Train the RL agent
+    train_rl_agent(merged_df)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
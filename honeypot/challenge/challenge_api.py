@@ -2,15 +2,59 @@
 
 from __future__ import annotations
 
+import atexit
 import json
+import logging
+import os
 import secrets
 import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Any
 
+from honeypot.write_buffer import open_connection
+
 DEFAULT_DB_PATH = Path("quantum_nexus.db")
 
+# Pending inserts are written at least this often (seconds), or as soon as
+# FLUSH_BATCH_SIZE rows are queued
+FLUSH_INTERVAL = 0.05
+FLUSH_BATCH_SIZE = 256
+
+# Estimated difficulties are reused for this many seconds, for up to
+# DIFFICULTY_CACHE_SIZE fingerprints (least recently used evicted first)
+DIFFICULTY_CACHE_TTL = 30.0
+DIFFICULTY_CACHE_SIZE = 4096
+
+# Random bytes per challenge id (hex encoded, so ids are twice as long)
+ID_BYTES = 8
+
+# Up to this many recently issued challenges are kept in memory so that
+# verification can skip SQLite (least recently used evicted first)
+CHALLENGE_CACHE_SIZE = 10_000
+
+# Response field compared against the stored answer, per challenge operation
+_RESPONSE_KEYS = {"sum": "answer", "sequence": "answer", "checksum": "checksum"}
+
+logger = logging.getLogger(__name__)
+
+# Statements are module constants so each connection's statement cache reuses
+# their compiled form
+_INSERT_CHALLENGE = (
+    "INSERT INTO challenges (id, fingerprint_hash, type, payload, difficulty, operation, answer) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_RESPONSE = (
+    "INSERT INTO challenge_responses (challenge_id, fingerprint_hash, response, success, score) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_SELECT_DETECTION_SCORE = "SELECT detection_score FROM bot_tracking WHERE fingerprint_hash = ?"
+_SELECT_CHALLENGE = "SELECT id, fingerprint_hash, operation, answer FROM challenges WHERE id = ?"
+_SELECT_PAYLOAD = "SELECT payload FROM challenges WHERE id = ?"
+
 
 @dataclass
 class Challenge:
@@ -36,8 +80,28 @@ class ChallengeAPI:
 
     def __init__(self, db_path: Path | str | None = None) -> None:
         self.db_path = Path(db_path or DEFAULT_DB_PATH)
+        self._local = threading.local()
         self._ensure_tables()
 
+        # Write-behind queues drained by the writer thread. Challenges stay in
+        # _unflushed until committed so verification can still find them.
+        self._pending_challenges: deque = deque()
+        self._pending_responses: deque = deque()
+        self._unflushed: Dict[str, Dict[str, Any]] = {}
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        # fingerprint_hash -> (expires_at, difficulty), see _estimate_difficulty
+        self._difficulty_cache: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        self._difficulty_lock = threading.Lock()
+        # challenge_id -> challenge row, see _get_challenge
+        self._challenge_cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._challenge_lock = threading.Lock()
+
+        self._start_writer()
+        atexit.register(self.flush)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
     # ------------------------------------------------------------------
     def create_challenge(self, fingerprint_hash: str, challenge_type: str = "adaptive") -> Dict[str, Any]:
         difficulty = self._estimate_difficulty(fingerprint_hash)
@@ -57,11 +121,14 @@ class ChallengeAPI:
         if not challenge_row:
             return {"challenge_id": challenge_id, "success": False, "score": 0.0, "reason": "unknown_challenge"}
 
-        expected = challenge_row["payload"]
-        success = self._evaluate_response(expected, response)
+        success = self._evaluate_response(challenge_row["operation"], challenge_row["answer"], response)
         score = 1.0 if success else 0.0
 
         self._persist_response(challenge_row, response, success, score)
+        if success:
+            # Challenges are single-use, so a solved one will not be looked up again
+            with self._challenge_lock:
+                self._challenge_cache.pop(challenge_id, None)
 
         return {
             "challenge_id": challenge_id,
@@ -70,108 +137,176 @@ class ChallengeAPI:
             "time_taken": response.get("time_taken", None) if isinstance(response, dict) else None,
         }
 
+    def invalidate_difficulty(self, fingerprint_hash: str) -> None:
+        """Forget the cached difficulty after the fingerprint's detection score changes."""
+        with self._difficulty_lock:
+            self._difficulty_cache.pop(fingerprint_hash, None)
+
+    def flush(self) -> None:
+        """Write all queued challenges and responses in a single transaction."""
+        with self._flush_lock:
+            challenges = [self._pending_challenges.popleft() for _ in range(len(self._pending_challenges))]
+            responses = [self._pending_responses.popleft() for _ in range(len(self._pending_responses))]
+            if not challenges and not responses:
+                return
+            conn = self._connection()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(_INSERT_CHALLENGE, challenges)
+                conn.executemany(_INSERT_RESPONSE, responses)
+                conn.execute("COMMIT")
+            except sqlite3.Error as exc:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                logger.error(
+                    "Dropped %d challenges and %d responses: %s", len(challenges), len(responses), exc
+                )
+            finally:
+                for row in challenges:
+                    self._unflushed.pop(row[0], None)
+
     # ------------------------------------------------------------------
+    def _start_writer(self) -> None:
+        threading.Thread(target=self._run_writer, name="challenge-writer", daemon=True).start()
+
+    def _after_fork(self) -> None:
+        """Give a forked child its own connections, locks and writer thread.
+
+        Rows queued before the fork are left for the parent to write.
+        """
+        self._local = threading.local()
+        self._pending_challenges.clear()
+        self._pending_responses.clear()
+        self._unflushed.clear()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._difficulty_lock = threading.Lock()
+        self._challenge_lock = threading.Lock()
+        self._start_writer()
+
+    def _run_writer(self) -> None:
+        while True:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's autocommit connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = open_connection(self.db_path)
+        return conn
+
     def _ensure_tables(self) -> None:
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS challenges (
-                    id TEXT PRIMARY KEY,
-                    fingerprint_hash TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    payload TEXT NOT NULL,
-                    difficulty INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """
+        conn = self._connection()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS challenges (
+                id TEXT PRIMARY KEY,
+                fingerprint_hash TEXT NOT NULL,
+                type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                difficulty INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                operation TEXT,
+                answer INTEGER
             )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS challenge_responses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    challenge_id TEXT NOT NULL,
-                    fingerprint_hash TEXT NOT NULL,
-                    response TEXT,
-                    success INTEGER,
-                    score REAL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """
+            """
+        )
+        # Tables created by the core migration predate the answer columns
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(challenges)")}
+        if "operation" not in columns:
+            conn.execute("ALTER TABLE challenges ADD COLUMN operation TEXT")
+        if "answer" not in columns:
+            conn.execute("ALTER TABLE challenges ADD COLUMN answer INTEGER")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS challenge_responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                challenge_id TEXT NOT NULL,
+                fingerprint_hash TEXT NOT NULL,
+                response TEXT,
+                success INTEGER,
+                score REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-            conn.commit()
-        finally:
-            conn.close()
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_challenge ON challenge_responses(challenge_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_challenge_fp_time "
+            "ON challenge_responses(fingerprint_hash, created_at DESC)"
+        )
 
     def _persist_challenge(self, challenge: Challenge) -> None:
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO challenges (id, fingerprint_hash, type, payload, difficulty)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    challenge.challenge_id,
-                    challenge.fingerprint_hash,
-                    challenge.challenge_type,
-                    json.dumps(challenge.payload),
-                    challenge.difficulty,
-                ),
+        row = {
+            "id": challenge.challenge_id,
+            "fingerprint_hash": challenge.fingerprint_hash,
+            "operation": challenge.payload["operation"],
+            "answer": challenge.payload["answer"],
+        }
+        self._unflushed[challenge.challenge_id] = row
+        self._cache_challenge(row)
+        self._pending_challenges.append(
+            (
+                challenge.challenge_id,
+                challenge.fingerprint_hash,
+                challenge.challenge_type,
+                json.dumps(challenge.payload),
+                challenge.difficulty,
+                challenge.payload["operation"],
+                challenge.payload["answer"],
             )
-            conn.commit()
-        finally:
-            conn.close()
-
-    def _persist_response(self, challenge_row: sqlite3.Row, response: Any, success: bool, score: float) -> None:
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO challenge_responses (challenge_id, fingerprint_hash, response, success, score)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    challenge_row["id"],
-                    challenge_row["fingerprint_hash"],
-                    json.dumps(response, default=str),
-                    1 if success else 0,
-                    score,
-                ),
+        )
+        if len(self._pending_challenges) >= FLUSH_BATCH_SIZE:
+            self._wake.set()
+
+    def _persist_response(self, challenge_row: Dict[str, Any], response: Any, success: bool, score: float) -> None:
+        self._pending_responses.append(
+            (
+                challenge_row["id"],
+                challenge_row["fingerprint_hash"],
+                json.dumps(response, default=str),
+                1 if success else 0,
+                score,
             )
-            conn.commit()
-        finally:
-            conn.close()
+        )
+        if len(self._pending_responses) >= FLUSH_BATCH_SIZE:
+            self._wake.set()
 
     def _generate_id(self) -> str:
-        return secrets.token_hex(8)
+        return secrets.token_hex(ID_BYTES)
 
     def _estimate_difficulty(self, fingerprint_hash: str) -> int:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT detection_score FROM bot_tracking WHERE fingerprint_hash = ?
-                """,
-                (fingerprint_hash,),
-            )
-            row = cursor.fetchone()
-            if not row:
-                return 3
-            score = float(row["detection_score"] or 0.5)
-            return max(1, min(int(round(score * 5)), 5))
-        finally:
-            conn.close()
+        now = time.monotonic()
+        with self._difficulty_lock:
+            cached = self._difficulty_cache.get(fingerprint_hash)
+            if cached is not None and cached[0] > now:
+                self._difficulty_cache.move_to_end(fingerprint_hash)
+                return cached[1]
+
+        difficulty = self._estimate_difficulty_uncached(fingerprint_hash)
+        with self._difficulty_lock:
+            self._difficulty_cache[fingerprint_hash] = (now + DIFFICULTY_CACHE_TTL, difficulty)
+            self._difficulty_cache.move_to_end(fingerprint_hash)
+            if len(self._difficulty_cache) > DIFFICULTY_CACHE_SIZE:
+                self._difficulty_cache.popitem(last=False)
+        return difficulty
+
+    def _estimate_difficulty_uncached(self, fingerprint_hash: str) -> int:
+        row = self._connection().execute(_SELECT_DETECTION_SCORE, (fingerprint_hash,)).fetchone()
+        if not row:
+            return 3
+        score = float(row["detection_score"] or 0.5)
+        return max(1, min(int(round(score * 5)), 5))
 
     def _build_payload(self, challenge_type: str, difficulty: int) -> Dict[str, Any]:
         base_timeout = 120 + (difficulty * 30)
         if challenge_type == "math":
-            numbers = [secrets.randbelow(50) + 1 for _ in range(3 + difficulty)]
+            # One urandom read per payload; the slight modulo bias is acceptable
+            numbers = [b % 50 + 1 for b in os.urandom(3 + difficulty)]
             return {"operation": "sum", "numbers": numbers, "answer": sum(numbers), "timeout": base_timeout}
         if challenge_type == "logic":
             return {
@@ -181,7 +316,7 @@ class ChallengeAPI:
                 "timeout": base_timeout,
             }
         # adaptive fallback
-        numbers = [secrets.randbelow(20) + 1 for _ in range(4)]
+        numbers = [b % 20 + 1 for b in os.urandom(4)]
         return {
             "operation": "checksum",
             "numbers": numbers,
@@ -189,32 +324,46 @@ class ChallengeAPI:
             "timeout": base_timeout,
         }
 
-    def _get_challenge(self, challenge_id: str) -> sqlite3.Row | None:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM challenges WHERE id = ?", (challenge_id,))
-            return cursor.fetchone()
-        finally:
-            conn.close()
-
-    def _evaluate_response(self, challenge_payload: str, response: Any) -> bool:
-        if isinstance(challenge_payload, str):
-            payload = json.loads(challenge_payload)
+    def _cache_challenge(self, row: Dict[str, Any]) -> None:
+        with self._challenge_lock:
+            self._challenge_cache[row["id"]] = row
+            self._challenge_cache.move_to_end(row["id"])
+            if len(self._challenge_cache) > CHALLENGE_CACHE_SIZE:
+                self._challenge_cache.popitem(last=False)
+
+    def _get_challenge(self, challenge_id: str) -> Dict[str, Any] | None:
+        with self._challenge_lock:
+            cached = self._challenge_cache.get(challenge_id)
+            if cached is not None:
+                self._challenge_cache.move_to_end(challenge_id)
+                return cached
+        pending = self._unflushed.get(challenge_id)
+        if pending is not None:
+            return pending
+        conn = self._connection()
+        row = conn.execute(_SELECT_CHALLENGE, (challenge_id,)).fetchone()
+        if row is None:
+            return None
+        if row["operation"] is not None:
+            challenge = dict(row)
         else:
-            payload = challenge_payload
+            # Rows written before the answer columns existed only carry the payload
+            payload = json.loads(conn.execute(_SELECT_PAYLOAD, (challenge_id,)).fetchone()["payload"])
+            challenge = {
+                "id": row["id"],
+                "fingerprint_hash": row["fingerprint_hash"],
+                "operation": payload.get("operation"),
+                "answer": payload.get("answer"),
+            }
+        self._cache_challenge(challenge)
+        return challenge
 
-        if not isinstance(response, dict):
+    def _evaluate_response(self, operation: str | None, answer: int | None, response: Any) -> bool:
+        if not isinstance(response, dict) or answer is None:
             return False
-
-        if payload.get("operation") == "sum":
-            return int(response.get("answer", -1)) == int(payload.get("answer", -2))
-        if payload.get("operation") == "sequence":
-            return int(response.get("answer", -1)) == int(payload.get("answer", -2))
-        if payload.get("operation") == "checksum":
-            return int(response.get("checksum", -1)) == int(payload.get("answer", -2))
-        return False
-
+        key = _RESPONSE_KEYS.get(operation)
+        if key is None:
+            return False
+        return int(response.get(key, -1)) == answer
 
 __all__ = ["ChallengeAPI", "Challenge"]
@@ -4,15 +4,69 @@ from __future__ import annotations
 
 import hashlib
 import json
-import sqlite3
+import math
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
-from statistics import mean
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+import numpy as np
+import orjson
+
+from honeypot.write_buffer import WriteBuffer, open_event_connection
 
 DEFAULT_DB_PATH = Path("quantum_nexus.db")
 
+# Scores and derived hashes are remembered for this many distinct
+# (ip, user agent, signals) payloads, least recently used evicted first
+ANALYSIS_CACHE_SIZE = 4096
+
+_INSERT_EVENT = (
+    "INSERT INTO fingerprint_events (fingerprint_hash, ip_address, user_agent, detection_score, payload) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+# (epoch second, its "YYYY-MM-DDTHH:MM:SS" UTC form), replaced once per second
+_timestamp_second: tuple = (-1, "")
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time in ISO 8601 with microseconds, without building a datetime."""
+    global _timestamp_second
+    seconds, micros = divmod(time.time_ns() // 1000, 1_000_000)
+    cached = _timestamp_second
+    if cached[0] != seconds:
+        cached = _timestamp_second = (seconds, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)))
+    return f"{cached[1]}.{micros:06d}"
+
+
+def _finite(value: Any, default: float) -> float:
+    """``float(value)``, or ``default`` for the NaN and infinite signals clients can send."""
+    value = float(value)
+    return value if math.isfinite(value) else default
+
+
+def _freeze(value: Any) -> Any:
+    """Return a hashable, key-order independent form of a JSON-like value.
+
+    Two values freeze equal only if they serialise to the same sorted-key JSON,
+    so a cached derived hash is never reused for a different payload.
+    """
+    if isinstance(value, dict):
+        # Keys keep their type: json.dumps writes True as "true" but "True" as-is
+        return tuple(sorted(((_freeze(key), _freeze(item)) for key, item in value.items()), key=lambda kv: repr(kv[0])))
+    if isinstance(value, (list, tuple)):
+        return (value.__class__, tuple(_freeze(item) for item in value))
+    if isinstance(value, (set, frozenset)):
+        return (value.__class__, frozenset(_freeze(item) for item in value))
+    if isinstance(value, str):
+        return value
+    # 1, 1.0 and True (or 0.0 and -0.0) compare equal but differ in repr()
+    return (value.__class__, repr(value))
+
 
 @dataclass
 class FingerprintAnalysis:
@@ -35,14 +89,24 @@ class FingerprintAnalysis:
 class FingerprintAPI:
     """Collects, stores and analyses fingerprint signals."""
 
-    def __init__(self, db_path: Path | str | None = None) -> None:
+    def __init__(self, db_path: Path | str | None = None, durability: str = "normal") -> None:
         self.db_path = Path(db_path or DEFAULT_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # One autocommit connection shared by all callers, serialised by _lock
+        self._conn, relaxed = open_event_connection(self.db_path, durability)
+        self._lock = threading.Lock()
         self._ensure_tables()
+        self._events = WriteBuffer(self._conn, self._lock, _INSERT_EVENT, "fingerprint_events", checkpoint=relaxed)
+        # frozen (ip, user agent, signals) -> [detection score, derived hash or None]
+        self._analysis_cache: OrderedDict[Any, list] = OrderedDict()
+        self._analysis_lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
-    def analyze_fingerprint(self, fingerprint_data: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_fingerprint(
+        self, fingerprint_data: Dict[str, Any], raw_payload: bytes | str | None = None
+    ) -> Dict[str, Any]:
         """
         Analyse an incoming fingerprint payload.
 
@@ -60,6 +124,9 @@ class FingerprintAPI:
                 - "user_agent" (str, optional): User agent string of the client.
                 - Additional keys may be present and will be used for scoring and analysis.
             All values should be JSON-serializable.
+        raw_payload : bytes | str, optional
+            The JSON document ``fingerprint_data`` was parsed from. When
+            given it is stored as-is instead of serialising the payload again.
 
         Returns
         -------
@@ -72,8 +139,44 @@ class FingerprintAPI:
         """
 
         payload = fingerprint_data or {}
-        fingerprint_hash = payload.get("fingerprint_hash") or self._derive_hash(payload)
-        score = self._calculate_detection_score(payload)
+        entry = self._cached_analysis(payload)
+        score = entry[0]
+        fingerprint_hash = payload.get("fingerprint_hash")
+        if not fingerprint_hash:
+            if entry[1] is None:
+                entry[1] = self._derive_hash(payload)
+            fingerprint_hash = entry[1]
+        return self._record_analysis(payload, fingerprint_hash, score, raw_payload)
+
+    def analyze_batch(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Analyse several fingerprint payloads at once.
+
+        Produces the same results as calling :meth:`analyze_fingerprint` on
+        each payload, with the detection scores computed as array operations
+        over the whole batch.
+        """
+        payloads = [payload or {} for payload in payloads]
+        scores = self._calculate_detection_scores(payloads)
+        return [
+            self._record_analysis(payload, payload.get("fingerprint_hash") or self._cached_hash(payload), score)
+            for payload, score in zip(payloads, scores.tolist())
+        ]
+
+    def flush(self) -> None:
+        """Write any queued fingerprint events."""
+        self._events.flush()
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _record_analysis(
+        self,
+        payload: Dict[str, Any],
+        fingerprint_hash: str,
+        score: float,
+        raw_payload: bytes | str | None = None,
+    ) -> Dict[str, Any]:
         components = self._extract_component_scores(payload, score)
 
         analysis = FingerprintAnalysis(
@@ -83,22 +186,57 @@ class FingerprintAPI:
             metadata={
                 "ip_address": payload.get("ip"),
                 "user_agent": payload.get("user_agent"),
-                "captured_at": datetime.utcnow().isoformat(),
+                "captured_at": _utc_timestamp(),
             },
         )
 
-        self._persist_event(analysis, payload)
+        self._persist_event(analysis, payload, raw_payload)
         return analysis.as_dict()
 
-    # ------------------------------------------------------------------
-    # Internal helpers
-    # ------------------------------------------------------------------
-    def _ensure_tables(self) -> None:
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
+    def _analysis_key(self, payload: Dict[str, Any]) -> Any:
+        """Return the analysis cache key for ``payload``, or None if it is unhashable."""
         try:
-            cursor = conn.cursor()
-            cursor.execute(
+            key = _freeze(
+                (payload.get("ip", ""), payload.get("user_agent", ""), payload.get("signals", {}))
+            )
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _cached_analysis(self, payload: Dict[str, Any]) -> list:
+        """Return the cached [score, derived hash] entry for a repeated payload."""
+        key = self._analysis_key(payload)
+        if key is None:
+            return [self._calculate_detection_score(payload), None]
+
+        with self._analysis_lock:
+            entry = self._analysis_cache.get(key)
+            if entry is not None:
+                self._analysis_cache.move_to_end(key)
+                return entry
+
+        entry = [self._calculate_detection_score(payload), None]
+        with self._analysis_lock:
+            self._analysis_cache[key] = entry
+            if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.popitem(last=False)
+        return entry
+
+    def _cached_hash(self, payload: Dict[str, Any]) -> str:
+        """Return the derived hash for ``payload``, reusing one already cached for it."""
+        key = self._analysis_key(payload)
+        with self._analysis_lock:
+            entry = self._analysis_cache.get(key) if key is not None else None
+        if entry is None:
+            return self._derive_hash(payload)
+        if entry[1] is None:
+            entry[1] = self._derive_hash(payload)
+        return entry[1]
+
+    def _ensure_tables(self) -> None:
+        with self._lock:
+            self._conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS fingerprint_events (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -106,72 +244,87 @@ class FingerprintAPI:
                     ip_address TEXT,
                     user_agent TEXT,
                     detection_score REAL,
-                    payload TEXT,
+                    payload BLOB,
                     captured_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
                 """
             )
-            conn.commit()
-        finally:
-            conn.close()
 
-    def _persist_event(self, analysis: FingerprintAnalysis, payload: Dict[str, Any]) -> None:
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO fingerprint_events (
-                    fingerprint_hash, ip_address, user_agent, detection_score, payload
-                ) VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    analysis.fingerprint_hash,
-                    analysis.metadata.get("ip_address"),
-                    analysis.metadata.get("user_agent"),
-                    analysis.detection_score,
-                    json.dumps(payload, default=str),
-                ),
+    def _persist_event(
+        self, analysis: FingerprintAnalysis, payload: Dict[str, Any], raw_payload: bytes | str | None = None
+    ) -> None:
+        if raw_payload is None:
+            # Bound as bytes so the JSON is stored as a BLOB without a UTF-8 round trip
+            raw_payload = orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+        elif isinstance(raw_payload, str):
+            raw_payload = raw_payload.encode("utf-8")
+        self._events.put(
+            (
+                analysis.fingerprint_hash,
+                analysis.metadata.get("ip_address"),
+                analysis.metadata.get("user_agent"),
+                analysis.detection_score,
+                raw_payload,
             )
-            conn.commit()
-        finally:
-            conn.close()
+        )
 
     def _derive_hash(self, payload: Dict[str, Any]) -> str:
-        seed_parts = [
-            payload.get("ip", ""),
-            payload.get("user_agent", ""),
-            json.dumps(payload.get("signals", {}), sort_keys=True),
-        ]
-        seed = "|".join(seed_parts)
-        return hashlib.sha256(seed.encode("utf-8")).hexdigest()
+        # Fed in pieces, but the same bytes as hashing "ip|user_agent|signals
+        # JSON" in one go, so returning clients keep their existing hash
+        digest = hashlib.sha256(str(payload.get("ip", "")).encode("utf-8"))
+        digest.update(b"|")
+        digest.update(str(payload.get("user_agent", "")).encode("utf-8"))
+        digest.update(b"|")
+        digest.update(json.dumps(payload.get("signals", {}), sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
 
     def _calculate_detection_score(self, payload: Dict[str, Any]) -> float:
         signals = payload.get("signals", {})
-        entropy = float(signals.get("entropy", 0.0))
-        anomalies = float(signals.get("anomalies", 0.0))
-        confidence = float(signals.get("confidence", 0.5))
+        # Non-finite signals count as missing, so the score is always finite
+        entropy = _finite(signals.get("entropy", 0.0), 0.0)
+        anomalies = _finite(signals.get("anomalies", 0.0), 0.0)
 
-        feature_scores = [confidence]
+        # Running sum and count of the feature scores that are present
+        total = _finite(signals.get("confidence", 0.5), 0.5)
+        count = 1
         if entropy:
-            feature_scores.append(min(entropy / 8.0, 1.0))
+            total += entropy * 0.125 if entropy < 8.0 else 1.0
+            count += 1
         if anomalies:
-            feature_scores.append(min(anomalies / 5.0, 1.0))
+            total += anomalies / 5.0 if anomalies < 5.0 else 1.0
+            count += 1
 
         behavioural_markers = signals.get("behaviour", {})
         if behavioural_markers:
-            feature_scores.append(
-                min(
-                    mean(1.0 if bool(value) else 0.3 for value in behavioural_markers.values()),
-                    1.0,
-                )
-            )
+            total += sum(1.0 if value else 0.3 for value in behavioural_markers.values()) / len(behavioural_markers)
+            count += 1
 
-        if not feature_scores:
-            return 0.5
+        score = total / count
+        return 0.0 if score < 0.0 else 1.0 if score > 1.0 else score
 
-        score = mean(feature_scores)
-        return max(0.0, min(score, 1.0))
+    def _calculate_detection_scores(self, payloads: List[Dict[str, Any]]) -> np.ndarray:
+        """Vectorised :meth:`_calculate_detection_score` over a batch of payloads."""
+        signals = [payload.get("signals", {}) for payload in payloads]
+        entropy = np.array([_finite(s.get("entropy", 0.0), 0.0) for s in signals])
+        anomalies = np.array([_finite(s.get("anomalies", 0.0), 0.0) for s in signals])
+        confidence = np.array([_finite(s.get("confidence", 0.5), 0.5) for s in signals])
+        behaviour = [s.get("behaviour", {}) for s in signals]
+        has_behaviour = np.array([bool(markers) for markers in behaviour])
+        behaviour_score = np.array(
+            [sum(1.0 if value else 0.3 for value in markers.values()) / len(markers) if markers else 0.0 for markers in behaviour]
+        )
+
+        # Entropy, anomaly and behaviour features only count when present
+        has_entropy = entropy != 0
+        has_anomalies = anomalies != 0
+        total = (
+            confidence
+            + np.where(has_entropy, np.minimum(entropy / 8.0, 1.0), 0.0)
+            + np.where(has_anomalies, np.minimum(anomalies / 5.0, 1.0), 0.0)
+            + behaviour_score
+        )
+        count = 1 + has_entropy + has_anomalies + has_behaviour
+        return np.clip(total / count, 0.0, 1.0)
 
     def _extract_component_scores(self, payload: Dict[str, Any], score: float) -> Dict[str, Any]:
         components = payload.get("components", {})
@@ -1,22 +1,53 @@
 """Sandbox execution utilities for the Quantum Deception Nexus honeypot."""
 from __future__ import annotations
 
-import sqlite3
+import atexit
+import hashlib
+import os
+import queue
 import subprocess
 import sys
-import tempfile
+import threading
 import time
 from pathlib import Path
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict
+
+from honeypot.write_buffer import WriteBuffer, open_event_connection
 
 DEFAULT_DB_PATH = Path("quantum_nexus.db")
 
-# Restricted Python code template that will be written to a temporary file
+_INSERT_RUN = (
+    "INSERT INTO sandbox_runs (fingerprint_hash, success, output, error, cpu_time, memory_kb, code) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Number of interpreters kept started and waiting for code
+SANDBOX_POOL_SIZE = 4
+
+# Code objects compiled by the workers are remembered for this many distinct
+# sources, least recently used evicted first
+SANDBOX_CODE_CACHE_SIZE = 1024
+
+# A worker only hands back code objects that fit in the pipe buffer, so its
+# write never blocks while the parent is still waiting on stdout and stderr
+SANDBOX_CODE_MAX_BYTES = 60000
+
+# Minimal environment for sandbox interpreters
+SANDBOX_ENV = {'PYTHONHASHSEED': '0', 'PATH': '', 'PYTHONIOENCODING': 'utf-8'}
+
+# Restricted Python worker run by each sandbox interpreter. It blocks reading
+# stdin, so it can be started before the code is known. The input is either
+# b"S" and the UTF-8 source, which the worker compiles, or b"M" and a code
+# object it compiled before. A freshly compiled code object is marshalled to
+# the pipe named by argv[1], which is closed before any user code runs.
 # This approach provides process isolation to prevent sandbox escapes
-SANDBOX_WRAPPER_TEMPLATE = '''import sys
+SANDBOX_WORKER = '''import marshal
+import os
+import sys
 
 # Define a minimal set of safe built-in functions
-safe_builtins = {{
+safe_builtins = {
     "abs": abs,
     "min": min,
     "max": max,
@@ -33,15 +64,101 @@ safe_builtins = {{
     "tuple": tuple,
     "set": set,
     "print": print,
-}}
+}
+
+code_fd = int(sys.argv[1])
+data = sys.stdin.buffer.read()
+try:
+    if data[:1] == b"M":
+        code = marshal.loads(data[1:])
+    else:
+        code = compile(data[1:].decode("utf-8"), "<sandbox>", "exec", dont_inherit=True)
+        compiled = marshal.dumps(code)
+        if len(compiled) <= %d:
+            os.write(code_fd, compiled)
+except Exception as e:
+    print(f"Error: {type(e).__name__}: {e}", file=sys.stderr)
+    sys.exit(1)
+finally:
+    os.close(code_fd)
 
 # Execute user code with restricted builtins
 try:
-    exec(compile({code_repr}, "<sandbox>", "exec"), {{"__builtins__": safe_builtins}})
+    exec(code, {"__builtins__": safe_builtins})
 except Exception as e:
-    print(f"Error: {{type(e).__name__}}: {{e}}", file=sys.stderr)
+    print(f"Error: {type(e).__name__}: {e}", file=sys.stderr)
     sys.exit(1)
-'''
+''' % SANDBOX_CODE_MAX_BYTES
+
+
+def _decode(stdout: bytes, stderr: bytes) -> tuple[str, str]:
+    return stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace")
+
+
+class _SandboxWorkerPool:
+    """Keeps pre-started sandbox interpreters ready for use.
+
+    Each interpreter runs exactly one snippet and exits, so no state is shared
+    between executions; the pool only moves interpreter startup off the
+    request path by starting the replacement as soon as a worker is taken.
+    Workers are handed out with the read end of their code object pipe.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._idle: queue.Queue = queue.Queue()
+        for _ in range(size):
+            self._idle.put(self._spawn())
+        atexit.register(self.close)
+
+    def acquire(self) -> tuple[subprocess.Popen, BinaryIO]:
+        """Return a started worker and its code pipe, and start its replacement."""
+        worker = None
+        while worker is None:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                worker = self._spawn()
+                break
+            if worker[0].poll() is not None:
+                worker[1].close()
+                worker = None
+        threading.Thread(target=self._replenish, daemon=True).start()
+        return worker
+
+    def _replenish(self) -> None:
+        self._idle.put(self._spawn())
+
+    def close(self) -> None:
+        while True:
+            try:
+                process, code_pipe = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            process.kill()
+            process.wait()
+            code_pipe.close()
+
+    @staticmethod
+    def _spawn() -> tuple[subprocess.Popen, BinaryIO]:
+        read_fd, write_fd = os.pipe()
+        try:
+            # The -u flag forces unbuffered stdout/stderr for better partial output capture;
+            # -s and -S skip the user site directory and site.py to shorten startup
+            process = subprocess.Popen(
+                [sys.executable, '-u', '-s', '-S', '-c', SANDBOX_WORKER, str(write_fd)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                pass_fds=(write_fd,),
+                # Additional security: limit environment variables
+                env=SANDBOX_ENV,
+            )
+        except BaseException:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        return process, os.fdopen(read_fd, "rb")
 
 
 class SandboxCore:
@@ -80,10 +197,18 @@ class SandboxCore:
     without compromising the host system.
     """
 
-    def __init__(self, db_path: Path | str | None = None, timeout: int = 5) -> None:
+    def __init__(self, db_path: Path | str | None = None, timeout: int = 5, durability: str = "normal") -> None:
         self.db_path = Path(db_path or DEFAULT_DB_PATH)
         self.timeout = timeout  # Maximum execution time in seconds
+        # One autocommit connection shared by all callers, serialised by _lock
+        self._conn, relaxed = open_event_connection(self.db_path, durability)
+        self._lock = threading.Lock()
         self._ensure_tables()
+        self._runs = WriteBuffer(self._conn, self._lock, _INSERT_RUN, "sandbox_runs", checkpoint=relaxed)
+        self._pool = _SandboxWorkerPool(SANDBOX_POOL_SIZE)
+        # sha256(source) -> marshalled code object compiled by a worker
+        self._code_cache: OrderedDict[bytes, bytes] = OrderedDict()
+        self._code_lock = threading.Lock()
 
     def execute_code(self, fingerprint_hash: str, code: str) -> Dict[str, Any]:
         start_time = time.perf_counter()
@@ -91,61 +216,39 @@ class SandboxCore:
         error_message = None
         output = ""
 
+        key = hashlib.sha256(code.encode("utf-8")).digest()
         try:
-            # Create a temporary file with the wrapped code
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as tmp_file:
-                # Use repr() to properly escape the user code as a string literal
-                code_repr = repr(code)
-                wrapped_code = SANDBOX_WRAPPER_TEMPLATE.format(code_repr=code_repr)
-                tmp_file.write(wrapped_code)
-                tmp_file.flush()
-                tmp_path = tmp_file.name
-
+            # Hand the code to an already started, single-use interpreter
+            process, code_pipe = self._pool.acquire()
             try:
-                # Execute in isolated subprocess with timeout
-                # Using Popen to properly capture partial output on timeout
-                # The -u flag forces unbuffered stdout/stderr for better partial output capture
-                process = subprocess.Popen(
-                    [sys.executable, '-u', tmp_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    # Additional security: limit environment variables
-                    env={'PYTHONHASHSEED': '0', 'PATH': ''}
-                )
-                
-                try:
-                    stdout, stderr = process.communicate(timeout=self.timeout)
-                    output = stdout.strip()
-                    
-                    if process.returncode != 0:
-                        success = False
-                        error_message = stderr.strip() or f"Process exited with code {process.returncode}"
-                        
-                except subprocess.TimeoutExpired:
-                    process.kill()
-                    # Collect any partial output that was captured before timeout
-                    stdout, stderr = process.communicate()
+                worker_input = self._worker_input(key, code)
+                stdout, stderr = _decode(*process.communicate(input=worker_input, timeout=self.timeout))
+                output = stdout.strip()
+
+                if process.returncode != 0:
                     success = False
-                    if stdout:
-                        output = stdout.strip()
-                    if stderr:
-                        error_message = stderr.strip()
-                    if not error_message:
-                        error_message = f"Execution timed out after {self.timeout} seconds"
-            except Exception as exc:
+                    error_message = stderr.strip() or f"Process exited with code {process.returncode}"
+
+            except subprocess.TimeoutExpired:
+                process.kill()
+                # Collect any partial output that was captured before timeout
+                stdout, stderr = _decode(*process.communicate())
                 success = False
-                error_message = f"Subprocess error: {str(exc)}"
+                if stdout:
+                    output = stdout.strip()
+                if stderr:
+                    error_message = stderr.strip()
+                if not error_message:
+                    error_message = f"Execution timed out after {self.timeout} seconds"
             finally:
-                # Clean up temporary file
-                try:
-                    Path(tmp_path).unlink()
-                except Exception:
-                    pass  # Best effort cleanup
-
-        except Exception as exc:  # pragma: no cover - defensive
+                # The worker has exited, so its end of the pipe is closed
+                with code_pipe:
+                    compiled = code_pipe.read()
+            if compiled:
+                self._remember_code(key, compiled)
+        except Exception as exc:
             success = False
-            error_message = f"Sandbox setup error: {str(exc)}"
+            error_message = f"Subprocess error: {str(exc)}"
 
         cpu_time = time.perf_counter() - start_time
         code_size_kb = len(code.encode("utf-8")) / 1024.0
@@ -162,12 +265,31 @@ class SandboxCore:
         self._persist_run(result_dict, code)
         return result_dict
 
+    def flush(self) -> None:
+        """Write any queued sandbox runs."""
+        self._runs.flush()
+
     # ------------------------------------------------------------------
+    def _worker_input(self, key: bytes, code: str) -> bytes:
+        """Return the worker's stdin: the cached code object for ``code``, else its source."""
+        with self._code_lock:
+            compiled = self._code_cache.get(key)
+            if compiled is not None:
+                self._code_cache.move_to_end(key)
+                return b"M" + compiled
+        return b"S" + code.encode("utf-8")
+
+    def _remember_code(self, key: bytes, compiled: bytes) -> None:
+        """Cache the code object a worker compiled, so the next run of that source skips parsing."""
+        with self._code_lock:
+            self._code_cache[key] = compiled
+            self._code_cache.move_to_end(key)
+            if len(self._code_cache) > SANDBOX_CODE_CACHE_SIZE:
+                self._code_cache.popitem(last=False)
+
     def _ensure_tables(self) -> None:
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
+        with self._lock:
+            self._conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS sandbox_runs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -182,33 +304,23 @@ class SandboxCore:
                 )
                 """
             )
-            conn.commit()
-        finally:
-            conn.close()
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sandbox_fp_time "
+                "ON sandbox_runs(fingerprint_hash, created_at DESC)"
+            )
 
     def _persist_run(self, result: Dict[str, Any], code: str) -> None:
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO sandbox_runs (
-                    fingerprint_hash, success, output, error, cpu_time, memory_kb, code
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    result["fingerprint_hash"],
-                    1 if result["success"] else 0,
-                    result["output"],
-                    result["error"],
-                    result["cpu_time"],
-                    result["memory_kb"],
-                    code,
-                ),
+        self._runs.put(
+            (
+                result["fingerprint_hash"],
+                1 if result["success"] else 0,
+                result["output"],
+                result["error"],
+                result["cpu_time"],
+                result["memory_kb"],
+                code,
             )
-            conn.commit()
-        finally:
-            conn.close()
+        )
 
 
 __all__ = ["SandboxCore"]
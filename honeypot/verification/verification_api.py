@@ -2,52 +2,97 @@
 
 from __future__ import annotations
 
-import json
+import math
 import sqlite3
+import threading
+from collections import deque
 from pathlib import Path
 from typing import Dict, Any
 
+import orjson
+
+from honeypot.write_buffer import WriteBuffer, open_event_connection
+
 DEFAULT_DB_PATH = Path("quantum_nexus.db")
 
+# The verified cutoff is mean + THRESHOLD_STDDEVS standard deviations of the
+# last THRESHOLD_WINDOW confidences, clamped to [DEFAULT_THRESHOLD,
+# THRESHOLD_CEILING]: a run of low scores never loosens verification below the
+# fixed cutoff, and a run of high ones never demands more than the ceiling. Until
+# THRESHOLD_MIN_SAMPLES confidences are seen the fixed DEFAULT_THRESHOLD is used.
+DEFAULT_THRESHOLD = 0.6
+THRESHOLD_CEILING = 0.9
+THRESHOLD_STDDEVS = 1.5
+THRESHOLD_WINDOW = 1000
+THRESHOLD_MIN_SAMPLES = 30
+
+_INSERT_RESULT = "INSERT INTO verification_results (fingerprint_hash, result) VALUES (?, ?)"
+# All evidence for one fingerprint in a single statement. The sandbox run is
+# LEFT JOINed onto a one-row base so a missing run leaves its columns NULL
+# (sandbox_runs.success is NOT NULL, so NULL there means no run)
+_SELECT_EVIDENCE = """
+    SELECT
+        (SELECT detection_score FROM bot_tracking WHERE fingerprint_hash = :fp) AS detection_score,
+        (SELECT score FROM challenge_responses WHERE fingerprint_hash = :fp
+         ORDER BY created_at DESC LIMIT 1) AS challenge_score,
+        sr.success, sr.cpu_time, sr.memory_kb
+    FROM (SELECT 1)
+    LEFT JOIN (
+        SELECT success, cpu_time, memory_kb FROM sandbox_runs WHERE fingerprint_hash = :fp
+        ORDER BY created_at DESC LIMIT 1
+    ) AS sr ON 1
+"""
+
 
 class VerificationAPI:
     """Aggregates evidence from multiple subsystems to verify a bot."""
 
-    def __init__(self, db_path: Path | str | None = None) -> None:
+    def __init__(self, db_path: Path | str | None = None, durability: str = "normal") -> None:
         self.db_path = Path(db_path or DEFAULT_DB_PATH)
+        # One autocommit connection shared by all callers, serialised by _lock
+        self._conn, relaxed = open_event_connection(self.db_path, durability)
+        self._lock = threading.Lock()
         self._ensure_tables()
+        self._results = WriteBuffer(self._conn, self._lock, _INSERT_RESULT, "verification_results", checkpoint=relaxed)
+        # Recent confidences with their running sum and sum of squares
+        self._confidences: deque = deque(maxlen=THRESHOLD_WINDOW)
+        self._confidence_sum = 0.0
+        self._confidence_sq_sum = 0.0
+        self._threshold_lock = threading.Lock()
 
     def verify_bot(self, fingerprint_hash: str, evidence: Dict[str, Any]) -> Dict[str, Any]:
-        fingerprint = self._load_fingerprint(fingerprint_hash)
-        challenge_result = self._load_latest_challenge(fingerprint_hash)
-        sandbox_result = self._load_latest_sandbox(fingerprint_hash)
+        evidence_row = self._load_evidence(fingerprint_hash)
 
         components = {
-            "fingerprint": fingerprint.get("detection_score", 0.0),
-            "challenge": challenge_result.get("score", 0.0),
-            "sandbox": sandbox_result.get("score", 0.0),
+            "fingerprint": float(evidence_row["detection_score"] or 0.0),
+            "challenge": float(evidence_row["challenge_score"] or 0.0),
+            "sandbox": self._sandbox_score(evidence_row),
             "behaviour": float(evidence.get("behaviour_score", 0.0)),
         }
 
         confidence = self._calculate_confidence(components)
-        verified = confidence >= 0.6
+        threshold = self._observe_confidence(confidence)
+        verified = confidence >= threshold
 
         result = {
             "fingerprint_hash": fingerprint_hash,
             "verified": verified,
             "confidence": round(confidence, 4),
+            "threshold": round(threshold, 4),
             "components": components,
         }
 
         self._persist_verification(fingerprint_hash, result)
         return result
 
+    def flush(self) -> None:
+        """Write any queued verification results."""
+        self._results.flush()
+
     # ------------------------------------------------------------------
     def _ensure_tables(self) -> None:
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
+        with self._lock:
+            self._conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS verification_results (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,67 +102,45 @@ class VerificationAPI:
                 )
                 """
             )
-            conn.commit()
-        finally:
-            conn.close()
-
-    def _load_fingerprint(self, fingerprint_hash: str) -> Dict[str, Any]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT detection_score FROM bot_tracking WHERE fingerprint_hash = ?",
-                (fingerprint_hash,),
-            )
-            row = cursor.fetchone()
-            return {"detection_score": float(row["detection_score"]) if row else 0.0}
-        finally:
-            conn.close()
-
-    def _load_latest_challenge(self, fingerprint_hash: str) -> Dict[str, Any]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT score FROM challenge_responses
-                WHERE fingerprint_hash = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-                """,
-                (fingerprint_hash,),
-            )
-            row = cursor.fetchone()
-            return {"score": float(row["score"]) if row else 0.0}
-        finally:
-            conn.close()
-
-    def _load_latest_sandbox(self, fingerprint_hash: str) -> Dict[str, Any]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT success, cpu_time, memory_kb
-                FROM sandbox_runs
-                WHERE fingerprint_hash = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-                """,
-                (fingerprint_hash,),
-            )
-            row = cursor.fetchone()
-            if not row:
-                return {"score": 0.0}
-            base = 0.7 if row["success"] else 0.1
-            resource_penalty = min((row["cpu_time"] or 0) / 30.0, 0.4)
-            memory_penalty = min((row["memory_kb"] or 0) / 51200.0, 0.3)
-            return {"score": max(0.0, base - resource_penalty - memory_penalty)}
-        finally:
-            conn.close()
+
+    def _load_evidence(self, fingerprint_hash: str) -> sqlite3.Row:
+        with self._lock:
+            return self._conn.execute(_SELECT_EVIDENCE, {"fp": fingerprint_hash}).fetchone()
+
+    def _sandbox_score(self, row: sqlite3.Row) -> float:
+        if row["success"] is None:
+            return 0.0
+        cpu_time = row["cpu_time"] or 0.0
+        memory_kb = row["memory_kb"] or 0.0
+        # Penalties are capped at 0.4 (cpu) and 0.3 (memory)
+        score = (
+            (0.7 if row["success"] else 0.1)
+            - (cpu_time / 30.0 if cpu_time < 12.0 else 0.4)
+            - (memory_kb / 51200.0 if memory_kb < 15360.0 else 0.3)
+        )
+        return score if score > 0.0 else 0.0
+
+    def _observe_confidence(self, confidence: float) -> float:
+        """Return the cutoff from the confidences seen so far, then record ``confidence``."""
+        with self._threshold_lock:
+            window = self._confidences
+            count = len(window)
+            if count < THRESHOLD_MIN_SAMPLES:
+                threshold = DEFAULT_THRESHOLD
+            else:
+                mean = self._confidence_sum / count
+                variance = max(self._confidence_sq_sum / count - mean * mean, 0.0)
+                threshold = mean + THRESHOLD_STDDEVS * math.sqrt(variance)
+                threshold = min(max(threshold, DEFAULT_THRESHOLD), THRESHOLD_CEILING)
+
+            if count == window.maxlen:
+                evicted = window[0]
+                self._confidence_sum -= evicted
+                self._confidence_sq_sum -= evicted * evicted
+            window.append(confidence)
+            self._confidence_sum += confidence
+            self._confidence_sq_sum += confidence * confidence
+        return threshold
 
     def _calculate_confidence(self, components: Dict[str, float]) -> float:
         weights = {
@@ -129,19 +152,7 @@ class VerificationAPI:
         return sum(components.get(key, 0.0) * weight for key, weight in weights.items())
 
     def _persist_verification(self, fingerprint_hash: str, result: Dict[str, Any]) -> None:
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO verification_results (fingerprint_hash, result)
-                VALUES (?, ?)
-                """,
-                (fingerprint_hash, json.dumps(result)),
-            )
-            conn.commit()
-        finally:
-            conn.close()
+        self._results.put((fingerprint_hash, orjson.dumps(result).decode()))
 
 
 __all__ = ["VerificationAPI"]
@@ -0,0 +1,173 @@
+"""Connections and batched write-behind for append-only honeypot tables."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Sequence, Tuple
+
+# Applied to every SQLite connection the honeypot opens, pooled or not. WAL
+# lets readers proceed while the single writer holds its lock.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=ON",
+)
+
+# Queued rows are written at least this often (seconds), or as soon as
+# FLUSH_BATCH_SIZE rows are waiting
+FLUSH_INTERVAL = 0.05
+FLUSH_BATCH_SIZE = 64
+
+# With relaxed durability, commits skip fsync and the WAL is only folded back
+# into the database by the writer thread every CHECKPOINT_INTERVAL seconds.
+# A crash may lose the last few seconds of rows.
+DURABILITY_MODES = ("normal", "relaxed")
+RELAXED_PRAGMAS = (
+    "PRAGMA synchronous=OFF",
+    "PRAGMA wal_autocheckpoint=0",
+)
+CHECKPOINT_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+def configure_durability(conn: sqlite3.Connection, durability: str) -> bool:
+    """Apply the PRAGMAs for ``durability``; True if the WAL must be checkpointed manually."""
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"Unknown durability {durability!r}, expected one of {DURABILITY_MODES}")
+    if durability != "relaxed":
+        return False
+    for pragma in RELAXED_PRAGMAS:
+        conn.execute(pragma)
+    return True
+
+
+def open_connection(db_path: Path | str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open an autocommit connection with Row results and :data:`SQLITE_PRAGMAS` applied."""
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def open_event_connection(db_path: Path | str, durability: str = "normal") -> Tuple[sqlite3.Connection, bool]:
+    """Open the connection an API shares between threads for its event tables.
+
+    Callers serialise access with their own lock. Returns the connection and
+    whether its WAL must be checkpointed manually, see
+    :func:`configure_durability`.
+    """
+    conn = open_connection(db_path, check_same_thread=False)
+    return conn, configure_durability(conn, durability)
+
+
+class WriteBuffer:
+    """Queues rows for a single INSERT statement and writes them in batches.
+
+    Rows are written by a daemon thread with ``executemany`` inside one
+    ``BEGIN IMMEDIATE`` transaction on the owner's connection, holding the
+    owner's lock so it never interleaves with other statements. With
+    ``checkpoint`` set the same thread also checkpoints the WAL, for
+    connections set up by :func:`configure_durability` in relaxed mode.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        lock: threading.Lock,
+        sql: str,
+        name: str,
+        checkpoint: bool = False,
+    ) -> None:
+        self._conn = conn
+        self._lock = lock
+        self._sql = sql
+        self._name = name
+        self._checkpoint = checkpoint
+        self._rows: deque = deque()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name=f"{name}-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def put(self, row: Sequence) -> None:
+        if self._closed:
+            return
+        self._rows.append(row)
+        if len(self._rows) >= FLUSH_BATCH_SIZE:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Write every queued row in a single transaction."""
+        with self._flush_lock:
+            rows = [self._rows.popleft() for _ in range(len(self._rows))]
+            if not rows:
+                return
+            with self._lock:
+                try:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    self._conn.executemany(self._sql, rows)
+                    self._conn.execute("COMMIT")
+                except sqlite3.Error as exc:
+                    try:
+                        if self._conn.in_transaction:
+                            self._conn.execute("ROLLBACK")
+                    except sqlite3.Error:
+                        pass
+                    logger.error("Dropped %d %s rows: %s", len(rows), self._name, exc)
+
+    def close(self) -> None:
+        """Write the queued rows and stop the writer thread.
+
+        Call before closing the connection; rows put afterwards are dropped.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.flush)
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        if self._checkpoint:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """Copy the WAL into the database file and truncate it."""
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as exc:
+                logger.error("WAL checkpoint for %s failed: %s", self._name, exc)
+
+    def _run(self) -> None:
+        next_checkpoint = time.monotonic() + CHECKPOINT_INTERVAL
+        while not self._closed:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+            if self._checkpoint and time.monotonic() >= next_checkpoint:
+                self.checkpoint()
+                next_checkpoint = time.monotonic() + CHECKPOINT_INTERVAL
+
+
+__all__ = [
+    "SQLITE_PRAGMAS",
+    "WriteBuffer",
+    "configure_durability",
+    "open_connection",
+    "open_event_connection",
+]
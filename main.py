@@ -10,74 +10,246 @@ import sys
 import signal
 import logging
 import argparse
-from typing import Optional
+import atexit
+import queue
+import asyncio
+import inspect
+import contextlib
+import ctypes
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from types import ModuleType
+from typing import TYPE_CHECKING, Optional
 import threading
 import time
 
+import psutil
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+
+# Every event loop the process creates, including the short-lived ones
+# behind health_check(), is a uvloop loop where uvloop is available
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop does not support Windows
+    uvloop = None
+else:
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+EVENT_LOOP = 'asyncio' if uvloop is None else 'uvloop'
+
 # Add project root to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Import application components
-from api.app import app, init_db, socketio
-from api.integrations import honeypot_integrator
-from api.scheduler import TaskScheduler
-from api.websocket_server import WebSocketServer
+# Application components are imported by main() once the arguments are
+# parsed, so --help never pays for them
+if TYPE_CHECKING:
+    from api.integrations import HoneypotIntegrator
+    from api.websocket_server import WebSocketServer
+
+# Log file rotation: size in bytes of each file and number of old files kept
+LOG_FILE_MAX_BYTES = 50 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('quantum_nexus.log')
-    ]
+# Configure logging. Loggers only queue their records; the listener thread
+# does the console and file writes, so no caller waits on log I/O.
+_log_queue = queue.SimpleQueue()
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = (
+    logging.StreamHandler(sys.stdout),
+    RotatingFileHandler('quantum_nexus.log', maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS)
 )
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_queue_handler = QueueHandler(_log_queue)
+# The listener's handlers apply the real format; this only folds any
+# exception text into the queued message
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+log_listener.start()
 logger = logging.getLogger(__name__)
 
+# Seconds a forced exit waits for the log queue to drain
+LOG_FLUSH_TIMEOUT = 1.0
+_log_stopped = False
+_log_stop_lock = threading.Lock()
+
+def stop_logging():
+    """Drain the log queue and sync the log file to disk; later calls do nothing."""
+    global _log_stopped
+    with _log_stop_lock:
+        if _log_stopped:
+            return
+        _log_stopped = True
+        try:
+            log_listener.stop()
+        except Exception:
+            pass
+        for handler in _log_handlers:
+            try:
+                handler.flush()
+                if isinstance(handler, logging.FileHandler) and handler.stream:
+                    os.fsync(handler.stream.fileno())
+            except (OSError, ValueError):
+                pass
+
+# Registered at import so it runs after shutdown() and anything main()
+# logs on the way out
+atexit.register(stop_logging)
+
+def _force_exit(code: int = 1):
+    """Exit without waiting for threads, giving the logs a bounded chance to flush."""
+    flusher = threading.Thread(target=stop_logging, daemon=True)
+    flusher.start()
+    flusher.join(LOG_FLUSH_TIMEOUT)
+    os._exit(code)
+
+# Seconds a health snapshot is served before health_check() probes again;
+# the health_monitor job refreshes it on the same cadence
+HEALTH_CHECK_TTL = 60.0
+
+# Component probes run concurrently; one that takes longer than
+# HEALTH_PROBE_TIMEOUT seconds is reported as an error
+HEALTH_PROBE_TIMEOUT = 1.0
+# Probes at least this slow are counted in the snapshot's statistics
+HEALTH_SLOW_PROBE = 1.0
+# Statistics cover each component's last HEALTH_HISTORY probe durations
+HEALTH_HISTORY = 64
+# Threads for synchronous component health_check() methods
+HEALTH_PROBE_THREADS = 8
+
+# Seconds a signal-initiated shutdown may take before the process is killed;
+# SIGINT gets time for a graceful stop, SIGTERM is expected to exit promptly
+SHUTDOWN_TIMEOUTS = {
+    signal.SIGINT: 10.0,
+    signal.SIGTERM: 3.0,
+}
+# glibc malloc arenas allowed when MALLOC_ARENA_MAX is not set in the
+# environment; fewer arenas keep RSS down with many worker threads
+MALLOC_ARENA_MAX = 2
+# mallopt() parameter number for M_ARENA_MAX in glibc's malloc.h
+_M_ARENA_MAX = -8
+
+# Maintenance jobs log their routine "running" line once per this many runs
+STATS_LOG_EVERY = 12
+HEALTH_LOG_EVERY = 10
+
+# Component teardowns run concurrently on this many threads and must all
+# finish within SHUTDOWN_DEADLINE seconds
+SHUTDOWN_THREADS = 4
+SHUTDOWN_DEADLINE = 2.5
+
+def limit_malloc_arenas(arenas: int) -> bool:
+    """Cap glibc malloc arenas for this process; returns False off glibc.
+    
+    The MALLOC_ARENA_MAX environment variable is only read when the process
+    starts, so setting it from Python has no effect; mallopt() does.
+    """
+    try:
+        mallopt = ctypes.CDLL(None).mallopt
+    except (OSError, AttributeError):
+        return False
+    return mallopt(_M_ARENA_MAX, arenas) == 1
+
+def parse_cpu_list(value: str) -> set:
+    """Parse a CPU list such as ``0,2-3`` into a set of CPU numbers."""
+    cpus = set()
+    try:
+        for part in value.split(','):
+            first, _, last = part.partition('-')
+            cpus.update(range(int(first), int(last or first) + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid CPU list: {value!r}")
+    if not cpus:
+        raise argparse.ArgumentTypeError(f"invalid CPU list: {value!r}")
+    return cpus
+
 class QuantumNexusSystem:
     """Main system class for Quantum Deception Nexus."""
     
-    def __init__(self):
-        self.scheduler: Optional[TaskScheduler] = None
-        self.websocket_server: Optional[WebSocketServer] = None
+    def __init__(self, api_app: ModuleType, integrator: 'HoneypotIntegrator'):
+        # The api.app module, providing the ASGI app and its startup hooks
+        self.api_app = api_app
+        self.integrator = integrator
+        self.scheduler: Optional[AsyncIOScheduler] = None
+        self.websocket_server: Optional['WebSocketServer'] = None
         self.shutdown_event = threading.Event()
+        # Set once shutdown() has begun, so a repeated signal kills immediately
+        self._shutdown_started = False
         self.components = {}
+        # (name, health_check or None, is_coroutine) per component, built
+        # once by initialize_components() so probing needs no lookups
+        self._probes = ()
+        # Latest health snapshot and the monotonic time it was taken at
+        self._health = None
+        self._health_taken = 0.0
+        self._health_lock = threading.Lock()
+        # Recent probe durations per component with their running sums and
+        # slow counts, see _record_probe()
+        self._probe_history = {}
+        self._probe_sums = Counter()
+        self._probe_slow = Counter()
+        self._probe_stats_lock = threading.Lock()
+        # Status seen by the last health_monitor run, logged on change
+        self._monitored_status = None
+        # Runs per maintenance job, for _log_every()
+        self._tick_counters = Counter()
+        # Private pool so a hung synchronous probe never holds up other
+        # executor users, or asyncio.run() waiting for its default executor
+        self._health_executor = ThreadPoolExecutor(HEALTH_PROBE_THREADS, thread_name_prefix='health-probe')
         
     def initialize_components(self):
         """Initialize all honeypot components."""
         logger.info("Initializing honeypot components...")
         
+        # Component being set up, named in the error if a step fails
+        component = 'scheduler'
         try:
-            # Initialize database
-            init_db()
-            logger.info("Database initialized successfully")
-            
-            # Initialize integrator
-            honeypot_integrator  # This ensures the global instance is created
-            logger.info("Honeypot integrator initialized")
+            # The database is initialized by api.app once the server is
+            # listening, or on the first request that needs it
             
-            # Initialize scheduler
-            self.scheduler = TaskScheduler()
-            self.scheduler.start()
-            logger.info("Task scheduler started")
+            # Initialize scheduler; it runs on uvicorn's event loop, so it is
+            # started by the ASGI startup hook rather than here. A job that
+            # overruns its interval is skipped, not run concurrently.
+            self.scheduler = AsyncIOScheduler(
+                timezone='UTC',
+                job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 30}
+            )
+            self.api_app.on_startup(self.scheduler.start)
+            # Stopped while its event loop is still running
+            self.api_app.on_shutdown(lambda: self.scheduler.shutdown(wait=False))
+            logger.info("Task scheduler initialized")
             
-            # Initialize WebSocket server
-            self.websocket_server = WebSocketServer(socketio)
+            # The WebSocket server is created with the app; its background
+            # tasks start when uvicorn runs the ASGI startup event
+            component = 'websocket'
+            self.websocket_server = self.api_app.websocket_server
             logger.info("WebSocket server initialized")
             
+            component = 'health'
+            self.api_app.set_health_probe(self.health_check, max_age=HEALTH_CHECK_TTL)
+            
             # Store component references
             self.components = {
                 'database': 'initialized',
-                'integrator': honeypot_integrator,
+                'integrator': self.integrator,
                 'scheduler': self.scheduler,
                 'websocket': self.websocket_server
             }
+            self._probes = tuple(
+                (name, probe, inspect.iscoroutinefunction(probe))
+                for name, probe in (
+                    (name, getattr(component, 'health_check', None))
+                    for name, component in self.components.items()
+                )
+            )
             
             logger.info("All components initialized successfully")
             return True
             
         except Exception as e:
-            logger.error(f"Component initialization failed: {e}")
+            logger.error(f"Component initialization failed in {component}: {e}")
             return False
             
     def start_background_tasks(self):
@@ -86,32 +258,35 @@ class QuantumNexusSystem:
         
         try:
             # Start periodic database cleanup
-            self.scheduler.add_task(
-                'database_cleanup',
+            self.scheduler.add_job(
                 self._cleanup_database,
-                interval=3600  # Every hour
+                IntervalTrigger(seconds=3600),  # Every hour
+                id='database_cleanup'
             )
             
             # Start statistics aggregation
-            self.scheduler.add_task(
-                'stats_aggregation',
+            self.scheduler.add_job(
                 self._aggregate_statistics,
-                interval=300  # Every 5 minutes
+                IntervalTrigger(seconds=300),  # Every 5 minutes
+                id='stats_aggregation'
             )
             
             # Start system health monitoring
-            self.scheduler.add_task(
-                'health_monitor',
+            self.scheduler.add_job(
                 self._monitor_system_health,
-                interval=60  # Every minute
+                IntervalTrigger(seconds=60),  # Every minute
+                id='health_monitor'
             )
             
+            # APScheduler logs every job execution at INFO
+            logging.getLogger('apscheduler.executors').setLevel(logging.WARNING)
+            
             logger.info("Background tasks started successfully")
             
         except Exception as e:
             logger.error(f"Failed to start background tasks: {e}")
             
-    def _cleanup_database(self):
+    async def _cleanup_database(self):
         """Clean up old database records."""
         try:
             logger.info("Running database cleanup...")
@@ -120,24 +295,35 @@ class QuantumNexusSystem:
         except Exception as e:
             logger.error(f"Database cleanup failed: {e}")
             
-    def _aggregate_statistics(self):
+    async def _aggregate_statistics(self):
         """Aggregate system statistics."""
         try:
-            logger.info("Aggregating system statistics...")
+            self._log_every('stats', STATS_LOG_EVERY, "Aggregating system statistics...")
             # Implementation would go here
             # Calculate daily/monthly stats, etc.
         except Exception as e:
             logger.error(f"Statistics aggregation failed: {e}")
             
-    def _monitor_system_health(self):
+    async def _monitor_system_health(self):
         """Monitor system health and emit alerts."""
         try:
-            logger.info("Monitoring system health...")
-            # Implementation would go here
-            # Check resource usage, component status, etc.
+            self._log_every('health', HEALTH_LOG_EVERY, "Monitoring system health...")
+            # Refresh the snapshot served by health_check()
+            health_status = await self._probe_components()
+            if health_status['status'] != self._monitored_status:
+                self._monitored_status = health_status['status']
+                log = logger.info if self._monitored_status == 'healthy' else logger.warning
+                log(f"System health is {self._monitored_status}: {health_status['components']}")
         except Exception as e:
             logger.error(f"Health monitoring failed: {e}")
             
+    def _log_every(self, key, n, message):
+        """Log ``message`` on the first and then every ``n``-th call for ``key``."""
+        count = self._tick_counters[key]
+        self._tick_counters[key] = count + 1
+        if count % n == 0:
+            logger.info(message)
+            
     def setup_signal_handlers(self):
         """Setup signal handlers for graceful shutdown."""
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -145,77 +331,241 @@ class QuantumNexusSystem:
         logger.info("Signal handlers registered")
         
     def _signal_handler(self, signum, frame):
-        """Handle shutdown signals."""
+        """Handle shutdown signals outside the event loop.
+        
+        Only flags the shutdown and unwinds the main thread; main() then
+        runs shutdown() from ordinary code rather than inside the handler,
+        which may have interrupted code holding locks.
+        """
+        if self._stopping(signum):
+            return
+        # Unwind through main() so finally blocks and atexit hooks still run
+        raise SystemExit(0)
+        
+    def _stopping(self, signum):
+        """Flag a signal-initiated shutdown; returns True if one was already under way.
+        
+        A repeated signal stops waiting and kills the process with the
+        signal's default action.
+        """
+        if self.shutdown_event.is_set():
+            logger.warning(f"Received signal {signum} during shutdown, exiting immediately")
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+            return True
+            
         logger.info(f"Received signal {signum}, initiating shutdown...")
-        self.shutdown()
+        self.shutdown_event.set()
+        # Watchdog in case a component hangs while shutting down
+        watchdog = threading.Timer(SHUTDOWN_TIMEOUTS.get(signum, 10.0), _force_exit)
+        watchdog.daemon = True
+        watchdog.start()
+        return False
         
-    def start_api_server(self, host: str = '0.0.0.0', port: int = 5000, debug: bool = False):
-        """Start the Flask API server."""
+    def start_api_server(self, host: str = '0.0.0.0', port: int = 5000, debug: bool = False,
+                         cpu_affinity: Optional[set] = None):
+        """Start the API server; blocks with uvicorn's event loop in the main thread."""
         logger.info(f"Starting API server on {host}:{port}")
         
+        if cpu_affinity:
+            # Keeping the event loop on a few cores improves cache residency
+            if hasattr(os, 'sched_setaffinity'):
+                os.sched_setaffinity(0, cpu_affinity)
+                logger.info(f"Pinned to CPUs {sorted(cpu_affinity)}")
+            else:
+                logger.warning("CPU affinity is not supported on this platform, ignoring --cpu-affinity")
+                
+        import uvicorn
+        
         try:
-            # Run the Flask app with SocketIO
-            socketio.run(
-                app, 
-                host=host, 
-                port=port, 
-                debug=debug,
-                allow_unsafe_werkzeug=True
+            # Flask and Socket.IO served from one ASGI app on a single
+            # event loop
+            config = uvicorn.Config(
+                self.api_app.asgi_app,
+                host=host,
+                port=port,
+                loop=EVENT_LOOP,
+                http='httptools',
+                workers=1,
+                log_level='debug' if debug else 'info'
             )
+            server = uvicorn.Server(config)
+            # Signals are taken by the event loop (see _serve) rather than by
+            # uvicorn's Python-level handlers
+            server.capture_signals = contextlib.nullcontext
+            with asyncio.Runner(loop_factory=config.get_loop_factory()) as runner:
+                runner.run(self._serve(server))
         except Exception as e:
             logger.error(f"API server failed to start: {e}")
             raise
             
-    def health_check(self) -> dict:
-        """Perform system health check."""
+    async def _serve(self, server):
+        """Run uvicorn with SIGINT/SIGTERM delivered through the event loop.
+        
+        ``loop.add_signal_handler`` routes signals through
+        ``signal.set_wakeup_fd``, so a signal wakes the loop's selector
+        immediately instead of waiting for the interpreter to run a handler.
+        """
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self._handle_server_signal, signum, server)
+        try:
+            await server.serve()
+        finally:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(signum)
+                signal.signal(signum, self._signal_handler)
+                
+    def _handle_server_signal(self, signum, server):
+        """Stop uvicorn on the first signal; main() shuts down once it returns."""
+        if not self._stopping(signum):
+            server.should_exit = True
+        
+    def health_check(self, *, fast: bool = False) -> dict:
+        """Return the system health, re-probing at most every HEALTH_CHECK_TTL seconds.
+        
+        With ``fast`` a stale snapshot is re-probed only until the first
+        component error, for liveness probes that only need the status.
+        Must not be called from a running event loop; coroutines use
+        :meth:`_probe_components` directly.
+        """
+        health_status = self._health
+        if health_status is None or time.monotonic() - self._health_taken >= HEALTH_CHECK_TTL:
+            with self._health_lock:
+                # Another caller may have refreshed it while we waited
+                health_status = self._health
+                if health_status is None or time.monotonic() - self._health_taken >= HEALTH_CHECK_TTL:
+                    health_status = asyncio.run(self._probe_components(fast=fast))
+        return {**health_status, 'components': dict(health_status['components'])}
+        
+    async def _probe_component(self, probe, is_coroutine):
+        """Run one component's health check, in the probe pool if it is synchronous."""
+        if probe is None:
+            return 'OK'
+        if is_coroutine:
+            return await probe()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._health_executor, probe)
+        
+    async def _timed_probe(self, name, probe, is_coroutine):
+        """Return (name, result, duration, failed) for one bounded probe."""
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self._probe_component(probe, is_coroutine), HEALTH_PROBE_TIMEOUT)
+            failed = False
+        except asyncio.TimeoutError:
+            result, failed = 'ERROR: timeout', True
+        except Exception as e:
+            result, failed = f'ERROR: {str(e)}', True
+        return name, result, time.perf_counter() - started, failed
+        
+    async def _probe_components(self, fast: bool = False) -> dict:
+        """Probe every component concurrently and return the result.
+        
+        A complete probe is stored as the health snapshot; with ``fast`` the
+        probe stops at the first error and the partial result is not stored.
+        """
         health_status = {
             'status': 'healthy',
             'timestamp': time.time(),
+            'system': {
+                'cpu_percent': psutil.cpu_percent(interval=None),
+                'memory_percent': psutil.virtual_memory().percent
+            },
             'components': {}
         }
         
-        # Check each component
-        for name, component in self.components.items():
-            try:
-                if hasattr(component, 'health_check'):
-                    health_status['components'][name] = component.health_check()
-                else:
-                    health_status['components'][name] = 'OK'
-            except Exception as e:
-                health_status['components'][name] = f'ERROR: {str(e)}'
-                health_status['status'] = 'degraded'
-                
+        tasks = [asyncio.ensure_future(self._timed_probe(*probe)) for probe in self._probes]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                name, result, duration, failed = await next_done
+                health_status['components'][name] = result
+                self._record_probe(name, duration)
+                if failed:
+                    health_status['status'] = 'degraded'
+                    if fast:
+                        return health_status
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        health_status['statistics'] = self._probe_statistics()
+        self._health = health_status
+        self._health_taken = time.monotonic()
         return health_status
         
+    def _record_probe(self, name, duration):
+        """Add a probe duration to the component's history, updating the running totals."""
+        with self._probe_stats_lock:
+            history = self._probe_history.get(name)
+            if history is None:
+                history = self._probe_history[name] = deque(maxlen=HEALTH_HISTORY)
+            if len(history) == HEALTH_HISTORY:
+                evicted = history[0]
+                self._probe_sums[name] -= evicted
+                if evicted >= HEALTH_SLOW_PROBE:
+                    self._probe_slow[name] -= 1
+            history.append(duration)
+            self._probe_sums[name] += duration
+            if duration >= HEALTH_SLOW_PROBE:
+                self._probe_slow[name] += 1
+                
+    def _probe_statistics(self) -> dict:
+        """Summarise the recorded probe durations; slowest_check has the highest mean."""
+        with self._probe_stats_lock:
+            total = sum(len(history) for history in self._probe_history.values())
+            slowest = max(
+                self._probe_history,
+                key=lambda name: self._probe_sums[name] / len(self._probe_history[name]),
+                default=None
+            )
+            return {
+                'total_checks': total,
+                'slow_checks': sum(self._probe_slow.values()),
+                'average_duration': sum(self._probe_sums.values()) / total if total else 0.0,
+                'slowest_check': slowest
+            }
+            
     def shutdown(self):
         """Gracefully shutdown the system."""
+        if self._shutdown_started:
+            return
+        self._shutdown_started = True
         logger.info("Initiating system shutdown...")
         
         # Set shutdown event
         self.shutdown_event.set()
         
-        try:
-            # Stop scheduler
-            if self.scheduler:
-                self.scheduler.stop()
-                logger.info("Scheduler stopped")
-                
-            # Close integrator connections
-            honeypot_integrator.close()
-            logger.info("Integrator connections closed")
-            
-            # Stop WebSocket server
-            if self.websocket_server:
-                # WebSocket will be stopped when Flask shuts down
-                pass
+        # Teardown steps run concurrently so a hung component cannot hold up
+        # the others
+        steps = {'integrator': self.integrator.close}
+        if self.scheduler and self.scheduler.running:
+            steps['scheduler'] = lambda: self.scheduler.shutdown(wait=False)
+        # WebSocket tasks are cancelled when uvicorn stops its loop
+        
+        executor = ThreadPoolExecutor(SHUTDOWN_THREADS, thread_name_prefix='shutdown')
+        futures = {executor.submit(step): name for name, step in steps.items()}
+        done, pending = wait(futures, timeout=SHUTDOWN_DEADLINE)
+        executor.shutdown(wait=False)
+        
+        for future in done:
+            error = future.exception()
+            if error is not None:
+                logger.error(f"Error during shutdown step {futures[future]}: {error}")
+            else:
+                logger.info(f"Shutdown step {futures[future]} completed")
                 
-            logger.info("System shutdown completed")
+        # Abandon any health probes still running
+        self._health_executor.shutdown(wait=False, cancel_futures=True)
+        
+        if pending:
+            for future in pending:
+                logger.error(f"Shutdown step {futures[future]} timed out")
+            # The stuck worker thread would block interpreter exit, so flush
+            # the log queue and leave without waiting for it
+            _force_exit()
             
-        except Exception as e:
-            logger.error(f"Error during shutdown: {e}")
-        finally:
-            # Force exit if needed
-            sys.exit(0)
+        logger.info("System shutdown completed")
 
 def main():
     """Main entry point."""
@@ -224,11 +574,22 @@ def main():
     parser.add_argument('--port', type=int, default=5000, help='Port to bind to')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
     parser.add_argument('--init-only', action='store_true', help='Initialize components and exit')
+    parser.add_argument('--cpu-affinity', type=parse_cpu_list, metavar='CPUS',
+                        help='Pin the server to these CPUs, e.g. 0,1 or 0-3 (Linux only)')
     
     args = parser.parse_args()
     
+    # Before the application starts its worker threads
+    if 'MALLOC_ARENA_MAX' not in os.environ:
+        limit_malloc_arenas(MALLOC_ARENA_MAX)
+        
+    # Import application components; creating api.app and the integrator
+    # sets up the Flask app, Socket.IO server and database pools
+    import api.app
+    from api.integrations import honeypot_integrator
+    
     # Create system instance
-    system = QuantumNexusSystem()
+    system = QuantumNexusSystem(api.app, honeypot_integrator)
     
     try:
         # Setup signal handlers
@@ -241,6 +602,7 @@ def main():
             
         # If init-only flag is set, exit after initialization
         if args.init_only:
+            system.api_app.ensure_db()
             logger.info("Initialization complete, exiting due to --init-only flag")
             sys.exit(0)
             
@@ -251,16 +613,18 @@ def main():
         system.start_api_server(
             host=args.host,
             port=args.port,
-            debug=args.debug
+            debug=args.debug,
+            cpu_affinity=args.cpu_affinity
         )
         
     except KeyboardInterrupt:
         logger.info("Received interrupt signal")
-        system.shutdown()
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-        system.shutdown()
         sys.exit(1)
+    finally:
+        # No-op if a signal handler already shut the system down
+        system.shutdown()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,19 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A database with the core migrations applied, as HoneypotIntegrator leaves it."""
+    path = tmp_path / "quantum_nexus.db"
+    with sqlite3.connect(path) as conn:
+        for script in sorted((ROOT / "honeypot" / "migrations").glob("*.sql")):
+            conn.executescript(script.read_text(encoding="utf-8"))
+    return path
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+
+import pytest
+
+from honeypot.challenge.challenge_api import ChallengeAPI
+
+
+@pytest.fixture
+def api(db_path):
+    api = ChallengeAPI(db_path)
+    yield api
+    api.flush()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_issues_its_own_ids_and_writes(api):
+    parent_ids = {api.create_challenge("fp-parent", "math")["id"] for _ in range(3)}
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - runs in the child
+        os.close(read_fd)
+        try:
+            challenge = api.create_challenge("fp-child", "math")
+            api.flush()
+            os.write(write_fd, challenge["id"].encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as pipe:
+        child_id = pipe.read().decode()
+    os.waitpid(pid, 0)
+    api.flush()
+
+    assert child_id and child_id not in parent_ids
+    assert child_id != api.create_challenge("fp-parent", "math")["id"]
+    api.flush()
+    with sqlite3.connect(api.db_path) as conn:
+        rows = conn.execute("SELECT fingerprint_hash, COUNT(*) FROM challenges GROUP BY fingerprint_hash").fetchall()
+    assert dict(rows) == {"fp-parent": 4, "fp-child": 1}
+
+
+def _solve(challenge):
+    payload = challenge["payload"]
+    if payload["operation"] == "checksum":
+        return {"checksum": sum(payload["numbers"]) % 7}
+    if payload["operation"] == "sequence":
+        step = payload["sequence"][1] - payload["sequence"][0]
+        return {"answer": payload["sequence"][-1] + step}
+    return {"answer": sum(payload["numbers"])}
+
+
+@pytest.mark.parametrize("challenge_type", ["math", "logic", "adaptive"])
+def test_challenge_round_trip(api, challenge_type):
+    challenge = api.create_challenge("fp-e2e", challenge_type)
+    assert challenge["type"] == challenge_type
+
+    wrong = api.verify_response(challenge["id"], {"answer": -5, "checksum": -5})
+    assert wrong["success"] is False and wrong["score"] == 0.0
+
+    right = api.verify_response(challenge["id"], _solve(challenge))
+    assert right["success"] is True and right["score"] == 1.0
+
+    # Solved challenges leave the cache but are still found in SQLite
+    api.flush()
+    assert api.verify_response(challenge["id"], _solve(challenge))["success"] is True
+    api.flush()
+    with sqlite3.connect(api.db_path) as conn:
+        outcomes = [row[0] for row in conn.execute(
+            "SELECT success FROM challenge_responses WHERE challenge_id = ? ORDER BY id", (challenge["id"],)
+        )]
+    assert outcomes == [0, 1, 1]
+
+
+def test_unknown_challenge(api):
+    result = api.verify_response("does-not-exist", {"answer": 1})
+    assert result == {"challenge_id": "does-not-exist", "success": False, "score": 0.0, "reason": "unknown_challenge"}
+
+
+@pytest.mark.parametrize("challenge_type", ["math", "logic", "adaptive"])
+def test_challenge_round_trip_through_integrator(tmp_path, monkeypatch, challenge_type):
+    # api.integrations creates its shared integrator's database in the working directory
+    monkeypatch.chdir(tmp_path)
+    from api.integrations import HoneypotIntegrator
+
+    integrator = HoneypotIntegrator(tmp_path / "integrator.db")
+    try:
+        analysis = integrator.process_fingerprint({"ip": "10.0.0.5", "signals": {"entropy": 4.0}})
+        fingerprint_hash = analysis["fingerprint_hash"]
+        challenge = integrator.generate_challenge(fingerprint_hash, challenge_type)
+        assert integrator.verify_challenge_response(challenge["id"], _solve(challenge))["success"] is True
+
+        history = integrator.get_bot_details(fingerprint_hash)["challenge_history"]
+        assert [entry["challenge_id"] for entry in history] == [challenge["id"]]
+        assert history[0]["success"] is True
+    finally:
+        integrator.close()
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import math
+
+import pytest
+
+from honeypot.fingerprinting.fingerprint_api import FingerprintAPI
+
+
+@pytest.fixture
+def api(tmp_path):
+    api = FingerprintAPI(tmp_path / "fingerprint.db")
+    yield api
+    api.flush()
+
+
+@pytest.mark.parametrize(
+    "signals",
+    [
+        {"confidence": "nan"},
+        {"confidence": float("inf")},
+        {"entropy": float("nan")},
+        {"entropy": float("-inf"), "anomalies": float("nan")},
+    ],
+)
+def test_non_finite_signals_count_as_missing(api, signals):
+    assert api._calculate_detection_score({"signals": signals}) == 0.5
+
+
+def test_detection_score_is_clamped(api):
+    assert api._calculate_detection_score({"signals": {"confidence": 9.0}}) == 1.0
+    assert api._calculate_detection_score({"signals": {"confidence": -9.0}}) == 0.0
+
+
+def test_analysis_result_is_finite(api):
+    result = api.analyze_fingerprint({"ip": "10.0.0.1", "signals": {"entropy": float("nan")}})
+    assert math.isfinite(result["detection_score"])
+
+
+PARITY_SIGNALS = [
+    {},
+    {"confidence": 0.9, "entropy": 3.2, "anomalies": 2, "behaviour": {"mouse": True, "keys": False}},
+    {"entropy": 20.0, "anomalies": 11.0},
+    {"entropy": -4.0, "anomalies": -2.5, "confidence": -0.3},
+    {"confidence": float("nan")},
+    {"entropy": float("nan"), "anomalies": 1.0},
+    {"entropy": float("inf"), "confidence": float("-inf")},
+    {"anomalies": float("-inf"), "behaviour": {"mouse": False}},
+]
+
+
+def test_batch_scores_match_scalar_scores(api):
+    payloads = [{"signals": signals} for signals in PARITY_SIGNALS]
+    batch = api._calculate_detection_scores(payloads).tolist()
+    assert batch == [api._calculate_detection_score(payload) for payload in payloads]
+
+
+def test_analyze_batch_matches_analyze_fingerprint(api):
+    payloads = [{"ip": f"10.0.0.{i}", "signals": signals} for i, signals in enumerate(PARITY_SIGNALS)]
+    single = [api.analyze_fingerprint(payload) for payload in payloads]
+    batch = api.analyze_batch(payloads)
+    for expected, actual in zip(single, batch):
+        assert actual["fingerprint_hash"] == expected["fingerprint_hash"]
+        assert actual["detection_score"] == expected["detection_score"]
+        assert actual["components"] == expected["components"]
+
+
+@pytest.mark.parametrize("value", [0.26015, 0.3, 0.12345, 0.99995, 1e12 + 0.5, float("nan")])
+def test_scores_are_rounded_like_round(api, value):
+    result = api.analyze_fingerprint({"ip": "10.0.0.9", "components": {"browser": {"score": value}}})
+    expected = round(value, 4)
+    assert result["components"]["browser"]["score"] == expected or math.isnan(expected)
+
+
+def test_derived_hash_is_unchanged_for_returning_clients(api):
+    payload = {"ip": "10.0.0.2", "user_agent": "curl/8.0", "signals": {"z": [1, 2.5], "a": {"y": True, "b": None}}}
+    seed = "|".join([payload["ip"], payload["user_agent"], json.dumps(payload["signals"], sort_keys=True)])
+    expected = hashlib.sha256(seed.encode("utf-8")).hexdigest()
+    assert api.analyze_fingerprint(payload)["fingerprint_hash"] == expected
+    # Served from the analysis cache the second time
+    assert api.analyze_fingerprint(dict(payload))["fingerprint_hash"] == expected
+
+
+def test_derived_hash_is_key_order_independent(api):
+    first = api.analyze_fingerprint({"signals": {"a": 1, "b": {"c": 2, "d": 3}}})
+    second = api.analyze_fingerprint({"signals": {"b": {"d": 3, "c": 2}, "a": 1}})
+    assert first["fingerprint_hash"] == second["fingerprint_hash"]
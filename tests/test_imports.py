@@ -0,0 +1,56 @@
+"""Import smoke tests for the modules the app and main.py load at startup."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+MODULES = [
+    "honeypot.write_buffer",
+    "honeypot.challenge.challenge_api",
+    "honeypot.fingerprinting.fingerprint_api",
+    "honeypot.sandbox.sandbox_core",
+    "honeypot.verification.verification_api",
+    "api.integrations",
+]
+
+
+def _import(module, tmp_path, code="", **env):
+    # api.integrations builds its integrator (and database) in the working
+    # directory on import, so each import runs in a fresh interpreter
+    return subprocess.run(
+        [sys.executable, "-c", f"import {module}\n{code}"],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(ROOT), **env},
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_module_imports(module, tmp_path):
+    result = _import(module, tmp_path)
+    assert result.returncode == 0, result.stderr
+
+
+def test_integrations_honours_durability(tmp_path):
+    assert _import("api.integrations", tmp_path, DATABASE_DURABILITY="relaxed").returncode == 0
+
+
+def test_integrations_rejects_unknown_durability(tmp_path):
+    result = _import("api.integrations", tmp_path, DATABASE_DURABILITY="fast")
+    assert result.returncode != 0
+    assert "DATABASE_DURABILITY" in result.stderr
+
+
+def test_integrations_pool_sizes_from_environment(tmp_path):
+    code = "i = api.integrations.honeypot_integrator; print(i.read_pool.pool_size, i.write_pool.pool_size)"
+    result = _import(
+        "api.integrations", tmp_path, code, DATABASE_READ_POOL_SIZE="3", DATABASE_WRITE_POOL_SIZE="2"
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["3", "2"]
@@ -0,0 +1,39 @@
+import hashlib
+
+import pytest
+
+from honeypot.sandbox.sandbox_core import SandboxCore
+
+
+@pytest.fixture(scope="module")
+def sandbox(tmp_path_factory):
+    sandbox = SandboxCore(tmp_path_factory.mktemp("sandbox") / "sandbox.db", timeout=5)
+    yield sandbox
+    sandbox.flush()
+
+
+def test_runs_code_and_caches_worker_compiled_code(sandbox):
+    source = "print(sum(range(10)))"
+    key = hashlib.sha256(source.encode("utf-8")).digest()
+
+    first = sandbox.execute_code("fp", source)
+    assert first["success"] and first["output"] == "45"
+    assert key in sandbox._code_cache
+
+    # The second run ships the cached code object instead of the source
+    assert sandbox._worker_input(key, source)[:1] == b"M"
+    second = sandbox.execute_code("fp", source)
+    assert second["success"] and second["output"] == "45"
+
+
+def test_syntax_errors_are_reported_by_the_worker(sandbox):
+    result = sandbox.execute_code("fp", "def (:")
+    assert not result["success"]
+    assert result["error"].startswith("Error: SyntaxError:")
+    assert hashlib.sha256(b"def (:").digest() not in sandbox._code_cache
+
+
+def test_restricted_builtins(sandbox):
+    result = sandbox.execute_code("fp", "open('/etc/passwd')")
+    assert not result["success"]
+    assert "NameError" in result["error"]
@@ -0,0 +1,44 @@
+import pytest
+
+from honeypot.verification.verification_api import (
+    DEFAULT_THRESHOLD,
+    THRESHOLD_CEILING,
+    THRESHOLD_MIN_SAMPLES,
+    VerificationAPI,
+)
+
+
+@pytest.fixture
+def api(tmp_path):
+    api = VerificationAPI(tmp_path / "verification.db")
+    yield api
+    api.flush()
+
+
+def _fill(api, confidences):
+    for confidence in confidences:
+        api._observe_confidence(confidence)
+
+
+def test_fixed_threshold_until_enough_samples(api):
+    _fill(api, [0.95] * (THRESHOLD_MIN_SAMPLES - 1))
+    assert api._observe_confidence(0.95) == DEFAULT_THRESHOLD
+
+
+def test_threshold_capped_for_high_skewed_window(api):
+    # Mostly ~0.95 with a few low outliers puts mean + 1.5 sd above 1.0
+    _fill(api, [0.95, 0.96, 0.97, 0.2] * 50)
+    threshold = api._observe_confidence(0.95)
+    assert threshold == THRESHOLD_CEILING
+    assert 0.95 >= threshold
+
+
+def test_threshold_never_below_default_for_low_window(api):
+    _fill(api, [0.1, 0.12, 0.08] * 50)
+    assert api._observe_confidence(0.1) == DEFAULT_THRESHOLD
+
+
+def test_threshold_follows_window_inside_band(api):
+    _fill(api, [0.6, 0.7] * 50)
+    # mean 0.65, sd 0.05
+    assert api._observe_confidence(0.65) == pytest.approx(0.725)
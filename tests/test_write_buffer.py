@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from honeypot import write_buffer
+from honeypot.write_buffer import WriteBuffer, open_connection, open_event_connection
+
+CHECKED_PRAGMAS = ("journal_mode", "synchronous", "busy_timeout", "cache_size", "temp_store", "mmap_size", "foreign_keys")
+
+
+def _pragmas(conn: sqlite3.Connection):
+    return {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in CHECKED_PRAGMAS}
+
+
+def test_pooled_and_event_connections_share_pragmas(tmp_path, monkeypatch):
+    # api.integrations creates its shared integrator's database in the working directory
+    monkeypatch.chdir(tmp_path)
+    from api.integrations import DatabaseConnectionPool
+
+    db_path = tmp_path / "pragmas.db"
+    pool = DatabaseConnectionPool(db_path, pool_size=1)
+    pooled = pool.get_connection()
+    plain = open_connection(db_path)
+    event, _ = open_event_connection(db_path)
+    try:
+        assert _pragmas(pooled) == _pragmas(plain) == _pragmas(event)
+        assert _pragmas(pooled)["foreign_keys"] == 1
+    finally:
+        plain.close()
+        event.close()
+        pool.close_all()
+
+
+@pytest.fixture
+def events(tmp_path):
+    conn, relaxed = open_event_connection(tmp_path / "events.db")
+    conn.execute("CREATE TABLE events (name TEXT NOT NULL)")
+    yield conn
+    conn.close()
+
+
+def _count(conn):
+    return conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+def test_flush_writes_queued_rows(events, monkeypatch):
+    # Keep the writer thread idle so only the explicit flush writes
+    monkeypatch.setattr(write_buffer, "FLUSH_INTERVAL", 60.0)
+    buffer = WriteBuffer(events, threading.Lock(), "INSERT INTO events (name) VALUES (?)", "events")
+    try:
+        for i in range(10):
+            buffer.put((f"event-{i}",))
+        assert _count(events) == 0
+        buffer.flush()
+        assert _count(events) == 10
+    finally:
+        buffer.close()
+
+
+def test_full_batch_wakes_the_writer(events, monkeypatch):
+    # Without the wake-up the writer would sleep for a minute
+    monkeypatch.setattr(write_buffer, "FLUSH_INTERVAL", 60.0)
+    buffer = WriteBuffer(events, threading.Lock(), "INSERT INTO events (name) VALUES (?)", "events")
+    try:
+        for i in range(write_buffer.FLUSH_BATCH_SIZE):
+            buffer.put((f"event-{i}",))
+        deadline = time.monotonic() + 5.0
+        while _count(events) < write_buffer.FLUSH_BATCH_SIZE and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _count(events) == write_buffer.FLUSH_BATCH_SIZE
+    finally:
+        buffer.close()
+
+
+def test_failed_batch_is_rolled_back(events):
+    buffer = WriteBuffer(events, threading.Lock(), "INSERT INTO events (name) VALUES (?)", "events")
+    try:
+        buffer.put(("kept",))
+        buffer.flush()
+        buffer.put(("dropped",))
+        buffer.put((None,))  # violates NOT NULL, so the whole batch is dropped
+        buffer.flush()
+        assert [row[0] for row in events.execute("SELECT name FROM events")] == ["kept"]
+        assert not events.in_transaction
+    finally:
+        buffer.close()
+
+
+def test_close_flushes_and_stops_the_writer(events):
+    buffer = WriteBuffer(events, threading.Lock(), "INSERT INTO events (name) VALUES (?)", "events", checkpoint=True)
+    buffer.put(("last",))
+    buffer.close()
+    assert not buffer._thread.is_alive()
+    assert _count(events) == 1
+
+    buffer.put(("late",))
+    buffer.flush()
+    assert _count(events) == 1
+    buffer.close()  # closing twice is a no-op